@@ -0,0 +1,951 @@
+# -*- coding: utf-8 -*-
+
+"""
+Class: CSRGraph
+"""
+
+import functools
+import heapq
+import json
+import mmap
+import os
+import sys
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Union
+
+from MyGraph import MyGraph, PathTree
+
+
+class CSRGraph:
+
+    """
+    Representação compacta e imutável de um grafo no formato CSR (compressed sparse row).
+    Os nodos são convertidos em inteiros e os arcos guardados em arrays contíguos:
+    os sucessores do nodo i são targets[offsets[i]:offsets[i+1]]
+    """
+
+    def __init__(self, nodes:list, offsets, targets, weights = None, rev_offsets = None, rev_sources = None):
+        """
+        Guarda as arrays do grafo e constrói a tabela de nodos e o índice reverso.
+        As arrays podem ser quaisquer sequências de números (array, memoryview, ...)
+
+        Parameters
+        ----------
+        :param nodes: Lista com o nome de cada nodo (o índice na lista é o identificador inteiro)
+        :param offsets: Array de tamanho V+1 com o início dos sucessores de cada nodo
+        :param targets: Array de tamanho E com o identificador do destino de cada arco
+        :param weights: Array de tamanho E com o peso de cada arco (None se o grafo não tem pesos)
+        :param rev_offsets: Array do índice reverso com o início dos antecessores de cada nodo (calculada se None)
+        :param rev_sources: Array do índice reverso com a origem de cada arco (calculada se None)
+        """
+        if len(offsets) != len(nodes) + 1 or len(targets) != offsets[-1]:
+            raise ValueError("As arrays 'offsets' e 'targets' não são consistentes com a tabela de nodos")
+        if weights is not None and len(weights) != len(targets):
+            raise ValueError("A array 'weights' deve ter o mesmo tamanho que 'targets'")
+
+        self.nodes = nodes
+        self.index = {v: i for i, v in enumerate(nodes)} #Tabela de nodos: nome -> inteiro
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.weighted = weights is not None
+        self.meta = {} #Metadados lidos de um snapshot (p.e. tipos de nodos de uma rede metabólica)
+        self._degrees = None #Graus de saída de cada nodo (calculados a pedido, ver _out_degrees)
+        if rev_offsets is None or rev_sources is None:
+            self._build_reverse()
+        else:
+            self.rev_offsets = rev_offsets
+            self.rev_sources = rev_sources
+
+
+    @classmethod
+    def from_graph(cls, g:MyGraph) -> "CSRGraph":
+        """
+        Converte um grafo (MyGraph ou MetabolicNetwork) para a representação CSR
+
+        Parameters
+        ----------
+        :param g: Grafo a converter
+        """
+        nodes = list(g.graph)
+        index = {v: i for i, v in enumerate(nodes)}
+        for v in g.rev_graph: #Destinos que não são chaves da lista de adjacência
+            if v not in index:
+                index[v] = len(nodes)
+                nodes.append(v)
+
+        offsets = array("q", [0])
+        targets = array("i")
+        ws = [] if g.weighted else None
+        for v in g.graph:
+            adj = g.graph[v]
+            targets.extend([index[d] for d in adj])
+            if ws is not None: ws.extend(adj.values())
+            offsets.append(len(targets))
+        for _ in range(len(offsets), len(nodes) + 1): #Nodos sem sucessores no fim da tabela
+            offsets.append(len(targets))
+
+        weights = None
+        if ws is not None:
+            weights = array("q" if all(type(w) == int for w in ws) else "d", ws)
+        return cls(nodes, offsets, targets, weights)
+
+
+    def _build_reverse(self):
+        """
+        Constrói o índice reverso (antecessores de cada nodo) em formato CSR, por contagem
+        """
+        n = len(self.nodes)
+        counts = [0] * (n + 1)
+        for t in self.targets:
+            counts[t + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+        rev_offsets = array("q", counts)
+        sources = array("i", bytes(4 * len(self.targets)))
+        pos = counts[:-1]
+        offsets, targets = self.offsets, self.targets
+        for u in range(n):
+            for j in range(offsets[u], offsets[u + 1]):
+                t = targets[j]
+                sources[pos[t]] = u
+                pos[t] += 1
+        self.rev_offsets = rev_offsets
+        self.rev_sources = sources
+
+
+    def __getstate__(self) -> dict:
+        """
+        Estado usado no pickle (p.e. ao enviar o grafo para outros processos): as arrays
+        mapeadas em memória (memoryview) são copiadas para arrays
+        """
+        state = self.__dict__.copy()
+        for k, val in state.items():
+            if isinstance(val, memoryview):
+                state[k] = array(val.format, val.tobytes())
+        return state
+
+
+    ## snapshots
+
+    _MAGIC = b"CSRGRPH1"
+    _ARRAYS = ("offsets", "targets", "weights", "rev_offsets", "rev_sources")
+
+    def save(self, filename:str, meta:dict = None):
+        """
+        Guarda o grafo num ficheiro binário compacto: cabeçalho JSON (tabela de nodos, tipos das
+        arrays e metadados) seguido das arrays CSR, alinhadas a 8 bytes para poderem ser mapeadas
+        em memória na leitura
+
+        Parameters
+        ----------
+        :param filename: Nome do ficheiro
+        :param meta: Dicionário (serializável em JSON) com metadados adicionais
+        """
+        #A tabela de nodos é guardada em JSON: outros tipos (p.e. tuplos) não seriam lidos de volta iguais
+        for v in self.nodes:
+            if type(v) not in (str, int, float):
+                raise TypeError(f"Nodo {v!r} não suportado nos snapshots: os nodos devem ser str, int ou float")
+        sections = {}
+        blobs = []
+        pos = 0
+        for name in self._ARRAYS:
+            arr = getattr(self, name)
+            if arr is None:
+                continue
+            if not isinstance(arr, array):
+                arr = array(arr.format, arr.tobytes())
+            data = arr.tobytes()
+            sections[name] = [arr.typecode, pos, len(arr)]
+            blobs.append(data + bytes(-len(data) % 8))
+            pos += len(data) + (-len(data) % 8)
+        header = json.dumps({"nodes": self.nodes, "byteorder": sys.byteorder,
+                             "sections": sections, "meta": meta or {}}).encode("utf-8")
+        header += b" " * (-len(header) % 8)
+        with open(filename, "wb") as wf:
+            wf.write(self._MAGIC)
+            wf.write(len(header).to_bytes(8, "little"))
+            wf.write(header)
+            for data in blobs:
+                wf.write(data)
+
+
+    @classmethod
+    def load(cls, filename:str, use_mmap:bool = True) -> tuple:
+        """
+        Lê um grafo guardado com save(). Devolve um tuplo (grafo CSR, metadados), ficando os
+        metadados também guardados no atributo 'meta' do grafo.
+        Com use_mmap=True, as arrays não são copiadas: ficam mapeadas em memória a partir do ficheiro
+
+        Parameters
+        ----------
+        :param filename: Nome do ficheiro
+        :param use_mmap: Se True, mapeia as arrays em memória em vez de as ler para arrays
+        """
+        with open(filename, "rb") as rf:
+            if rf.read(len(cls._MAGIC)) != cls._MAGIC:
+                raise ValueError(f"O ficheiro '{filename}' não é um snapshot de grafo válido")
+            hlen = int.from_bytes(rf.read(8), "little")
+            header = json.loads(rf.read(hlen).decode("utf-8"))
+            start = len(cls._MAGIC) + 8 + hlen
+            swap = header["byteorder"] != sys.byteorder
+            if use_mmap and not swap:
+                buf = memoryview(mmap.mmap(rf.fileno(), 0, access = mmap.ACCESS_READ))
+            else:
+                buf = memoryview(rf.read())
+                start = 0
+        arrays = {}
+        for name, (typecode, pos, length) in header["sections"].items():
+            size = array(typecode).itemsize * length
+            chunk = buf[start + pos:start + pos + size]
+            if use_mmap and not swap:
+                arrays[name] = chunk.cast(typecode)
+            else:
+                arr = array(typecode, chunk.tobytes())
+                if swap: arr.byteswap()
+                arrays[name] = arr
+        csr = cls(header["nodes"], arrays["offsets"], arrays["targets"], arrays.get("weights"),
+                  arrays.get("rev_offsets"), arrays.get("rev_sources"))
+        csr.meta = header["meta"]
+        return csr, csr.meta
+
+
+    def to_adjacency(self) -> dict:
+        """
+        Devolve a lista de adjacência do grafo ({nodo: {sucessor: peso}}), como usada em MyGraph
+        """
+        g = {}
+        nodes, weights = self.nodes, self.weights
+        for i, v in enumerate(nodes):
+            if weights is None:
+                g[v] = {nodes[t]: None for t in self._succ_idx(i)}
+            else:
+                g[v] = {nodes[t]: weights[j] for j, t in enumerate(self._succ_idx(i), self.offsets[i])}
+        return g
+
+
+    def to_graph(self) -> MyGraph:
+        """
+        Converte a representação CSR de volta para um MyGraph (mutável)
+        """
+        return MyGraph(self.to_adjacency(), self.weighted)
+
+
+    def _check_valid(self, v) -> bool:
+        """
+        Verifica se um nodo está presente no grafo
+
+        Parameters
+        ----------
+        :param v: Possível nodo no grafo
+        """
+        return v in self.index
+
+
+    def _succ_idx(self, i:int):
+        """
+        Devolve os identificadores dos sucessores do nodo com identificador i
+
+        Parameters
+        ----------
+        :param i: Identificador inteiro do nodo
+        """
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+
+    def _pred_idx(self, i:int):
+        """
+        Devolve os identificadores dos antecessores do nodo com identificador i
+
+        Parameters
+        ----------
+        :param i: Identificador inteiro do nodo
+        """
+        return self.rev_sources[self.rev_offsets[i]:self.rev_offsets[i + 1]]
+
+
+    ## get basic info
+
+    def get_nodes(self) -> list:
+        """
+        Devolve uma lista dos nodos do grafo
+        """
+        return list(self.nodes)
+
+
+    def size(self) -> tuple:
+        """
+        Devolve o tamanho do grafo: número de nodos, número de arcos
+        """
+        return len(self.nodes), len(self.targets)
+
+
+    def get_successors(self, v) -> list:
+        """
+        Devolve lista dos sucessores do nodo especificado
+
+        Parameters
+        ----------
+        :param v: Nodo do grafo
+        """
+        if not self._check_valid(v):
+            return []
+        return [self.nodes[t] for t in self._succ_idx(self.index[v])]
+
+
+    def get_predecessors(self, v) -> list:
+        """
+        Devolve lista dos antecessores do nodo especificado
+
+        Parameters
+        ----------
+        :param v: Nodo do grafo
+        """
+        if not self._check_valid(v):
+            return []
+        return [self.nodes[s] for s in self._pred_idx(self.index[v])]
+
+
+    def get_adjacents(self, v) -> list:
+        """
+        Devolve lista dos sucessores e antecessores do nodo especificado
+
+        Parameters
+        ----------
+        :param v: Nodo do grafo
+        """
+        if not self._check_valid(v):
+            return []
+        i = self.index[v]
+        return [self.nodes[a] for a in set(self._succ_idx(i)) | set(self._pred_idx(i))]
+
+
+    ## degrees
+
+    def out_degree(self, v) -> int:
+        """
+        Devolve o grau de saída do nodo especificado
+
+        Parameters
+        ----------
+        :param v: Nodo do grafo
+        """
+        if not self._check_valid(v):
+            return 0
+        i = self.index[v]
+        return self.offsets[i + 1] - self.offsets[i]
+
+
+    def in_degree(self, v) -> int:
+        """
+        Devolve o grau de entrada do nodo especificado
+
+        Parameters
+        ----------
+        :param v: Nodo do grafo
+        """
+        if not self._check_valid(v):
+            return 0
+        i = self.index[v]
+        return self.rev_offsets[i + 1] - self.rev_offsets[i]
+
+
+    def degree(self, v) -> int:
+        """
+        Devolve grau de entrada e saída do nodo especificado
+
+        Parameters
+        ----------
+        :param v: Nodo do grafo
+        """
+        if not self._check_valid(v):
+            return 0
+        i = self.index[v]
+        return len(set(self._succ_idx(i)) | set(self._pred_idx(i)))
+
+
+    ## BFS and DFS searches
+
+    def _bfs_edges(self, s:int):
+        """
+        Núcleo das procuras em largura sobre identificadores inteiros: gera os arcos
+        (pai, nodo, posição do arco) da árvore BFS pela ordem de descoberta
+
+        Parameters
+        ----------
+        :param s: Identificador do nodo de origem
+        """
+        offsets, targets = self.offsets, self.targets
+        visited = bytearray(len(self.nodes))
+        visited[s] = 1
+        queue = deque([s])
+        while queue:
+            u = queue.popleft()
+            for j in range(offsets[u], offsets[u + 1]):
+                t = targets[j]
+                if not visited[t]:
+                    visited[t] = 1
+                    queue.append(t)
+                    yield u, t, j
+
+
+    def iter_bfs(self, v, dist:bool = False):
+        """
+        Gera os nodos atingíveis a partir do nodo especificado (procura em largura)
+
+        Parameters
+        ----------
+        :param v: Nodo de origem
+        :param dist: Se True, gera tuplos (nodo, distância acumulada ao longo da árvore BFS)
+        """
+        if not self._check_valid(v):
+            return
+        nodes = self.nodes
+        s = self.index[v]
+        if not dist:
+            for _, t, _ in self._bfs_edges(s):
+                yield nodes[t]
+        else:
+            weights = self.weights
+            dists = {s: 0}
+            for u, t, j in self._bfs_edges(s):
+                d = dists[u] + (weights[j] if weights is not None else 1)
+                dists[t] = d
+                yield nodes[t], d
+
+
+    def iter_dfs(self, v, depth:bool = False):
+        """
+        Gera os nodos atingíveis a partir do nodo especificado (procura em profundidade, em pré-ordem)
+
+        Parameters
+        ----------
+        :param v: Nodo de origem
+        :param depth: Se True, gera tuplos (nodo, profundidade na árvore DFS)
+        """
+        if not self._check_valid(v):
+            return
+        nodes = self.nodes
+        s = self.index[v]
+        visited = bytearray(len(nodes))
+        visited[s] = 1
+        stack = [iter(self._succ_idx(s))]
+        while stack:
+            for t in stack[-1]:
+                if not visited[t]:
+                    visited[t] = 1
+                    yield (nodes[t], len(stack)) if depth else nodes[t]
+                    stack.append(iter(self._succ_idx(t)))
+                    break
+            else:
+                stack.pop()
+
+
+    def reachable_bfs(self, v) -> list:
+        """
+        Devolve lista de nodos atingíveis através do nodo especificado (procura em largura)
+
+        Parameters
+        ----------
+        :param v: Nodo do grafo
+        """
+        return list(self.iter_bfs(v))
+
+
+    def reachable_dfs(self, v) -> list:
+        """
+        Devolve lista de nodos atingíveis através do nodo especificado (procura em profundidade)
+
+        Parameters
+        ----------
+        :param v: Nodo do grafo
+        """
+        if not self._check_valid(v):
+            return []
+        #Mesma ordem de MyGraph.reachable_dfs (nodos marcados como visitados ao serem empilhados)
+        nodes = self.nodes
+        s = self.index[v]
+        visited = bytearray(len(nodes))
+        visited[s] = 1
+        stack = [s]
+        res = []
+        while stack:
+            u = stack.pop()
+            if u != s: res.append(nodes[u])
+            new = [t for t in self._succ_idx(u) if not visited[t]]
+            for t in new:
+                visited[t] = 1
+            stack.extend(reversed(new))
+        return res
+
+
+    def reachable_with_dist(self, o) -> list:
+        """
+        Devolve uma lista de tuplos contendo os nodos atingíveis e as suas respetivas distâncias
+        a partir de um nodo de origem
+
+        Parameters
+        ----------
+        :param o: Nodo de origem
+        """
+        return list(self.iter_bfs(o, True))
+
+
+    # distâncias
+
+    def distance(self, o, d) -> Union[int,float,None]:
+        """
+        Devolve a distância entre 2 nodos (com a mesma semântica de MyGraph.distance)
+
+        Parameters
+        ----------
+        :param o: Nodo de origem
+        :param d: Nodo de destino
+        """
+        if not self._check_valid(o):
+            return None
+        if o == d: return 0
+        if self.weighted:
+            return self.dijkstra_tree(o, d).distance(d)
+        for node, dist in self.iter_bfs(o, True):
+            if node == d:
+                return dist
+        return None
+
+
+    def shortest_path(self, o, d) -> Union[list,str,None]:
+        """
+        Devolve o caminho mais curto entre 2 nodos (lista de nodos quando o grafo não tem
+        pesos; representação textual do caminho de Dijkstra quando tem)
+
+        Parameters
+        ----------
+        :param o: Nodo de origem
+        :param d: Nodo de destino
+        """
+        if self.weighted:
+            return self.dijkstra(o, d)
+        if not self._check_valid(o):
+            return None
+        if o == d: return [o, d]
+        if not self._check_valid(d):
+            return None
+        target = self.index[d]
+        parents = {}
+        for u, t, _ in self._bfs_edges(self.index[o]):
+            parents[t] = u
+            if t == target:
+                path = [self.nodes[t]]
+                while t in parents:
+                    t = parents[t]
+                    path.append(self.nodes[t])
+                path.reverse()
+                return path
+        return None
+
+
+    def _dijkstra_idx(self, s:int, target:int = -1) -> tuple:
+        """
+        Núcleo do algoritmo de Dijkstra sobre identificadores inteiros. Devolve um tuplo
+        (distâncias, antecessores, nodos fixados por ordem)
+
+        Parameters
+        ----------
+        :param s: Identificador do nodo de origem
+        :param target: Identificador do nodo de destino (-1 para calcular a árvore completa)
+        """
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        dist = {s: 0}
+        prev = {s: -1}
+        done = bytearray(len(self.nodes))
+        settled = []
+        heap = [(0, s)]
+        while heap:
+            d_u, u = heapq.heappop(heap)
+            if done[u]:
+                continue
+            done[u] = 1
+            settled.append(u)
+            if u == target:
+                break
+            for j in range(offsets[u], offsets[u + 1]):
+                t = targets[j]
+                if done[t]:
+                    continue
+                nd = d_u + (weights[j] if weights is not None else 1)
+                if t not in dist or nd < dist[t]:
+                    dist[t] = nd
+                    prev[t] = u
+                    heapq.heappush(heap, (nd, t))
+        return dist, prev, settled
+
+
+    def dijkstra_tree(self, o, target = None) -> Union[PathTree,None]:
+        """
+        Devolve a árvore de caminhos mais curtos a partir de um nodo de origem (algoritmo de Dijkstra com heap)
+
+        Parameters
+        ----------
+        :param o: Nodo de origem
+        :param target: Nodo de destino opcional (a procura termina quando este é fixado)
+        """
+        if not self._check_valid(o):
+            return None
+        dist, prev, settled = self._dijkstra_idx(self.index[o], self.index.get(target, -1))
+        nodes = self.nodes
+        return PathTree(o, {nodes[u]: dist[u] for u in settled},
+                        {nodes[u]: (nodes[prev[u]] if prev[u] >= 0 else None) for u in settled})
+
+
+    def dijkstra(self, o, d) -> Union[str,bool,None]:
+        """
+        Devolve o caminho mais curto entre 2 nodos pelo algoritmo de Dijkstra
+        (com o mesmo formato de MyGraph.dijkstra)
+
+        Parameters
+        ----------
+        :param o: Nodo de origem
+        :param d: Nodo de destino
+        """
+        if not self._check_valid(o) or not self._check_valid(d):
+            return None
+        path = self.dijkstra_tree(o, d).path(d)
+        if path is None:
+            return False
+        return str(path)
+
+
+    ## all-pairs distances
+
+    def _out_degrees(self) -> list:
+        """
+        Devolve a lista dos graus de saída de cada nodo, indexada pelos identificadores inteiros
+        (usada para contar os arcos percorridos pelas procuras; calculada uma única vez)
+        """
+        if self._degrees is None:
+            offsets = self.offsets
+            self._degrees = [offsets[i + 1] - offsets[i] for i in range(len(self.nodes))]
+        return self._degrees
+
+
+    def _distance_stats(self, sources, count:bool = False) -> tuple:
+        """
+        Calcula as somas parciais das distâncias a partir de um conjunto de nodos de origem
+        (BFS por níveis se o grafo não tem pesos, Dijkstra caso contrário).
+        Devolve um tuplo (soma das distâncias, número de pares atingíveis, histograma das distâncias,
+        nodos visitados, arcos percorridos)
+
+        Parameters
+        ----------
+        :param sources: Iterável de identificadores inteiros dos nodos de origem
+        :param count: Se True, conta os nodos visitados e os arcos percorridos (caso contrário, são 0)
+        """
+        offsets, targets = self.offsets, self.targets
+        n = len(self.nodes)
+        tot = 0
+        pairs = 0
+        hist = {}
+        visits = edges = 0
+        degree = self._out_degrees().__getitem__ if count else None
+        for s in sources:
+            if self.weighted:
+                dist, _, settled = self._dijkstra_idx(s)
+                for t, d in dist.items():
+                    if t != s:
+                        tot += d
+                        hist[d] = hist.get(d, 0) + 1
+                pairs += len(dist) - 1
+                if count:
+                    visits += len(settled)
+                    edges += sum(map(degree, settled))
+            else:
+                visited = bytearray(n)
+                visited[s] = 1
+                frontier = [s]
+                level = 0
+                while frontier:
+                    level += 1
+                    nxt = []
+                    if count:
+                        visits += len(frontier)
+                        edges += sum(map(degree, frontier))
+                    for u in frontier:
+                        for t in targets[offsets[u]:offsets[u + 1]]:
+                            if not visited[t]:
+                                visited[t] = 1
+                                nxt.append(t)
+                    if nxt:
+                        tot += level * len(nxt)
+                        pairs += len(nxt)
+                        hist[level] = hist.get(level, 0) + len(nxt)
+                    frontier = nxt
+        return tot, pairs, hist, visits, edges
+
+
+    def _map_sources(self, worker, local, sources, processes:int = None, chunksize:int = None):
+        """
+        Gerador dos resultados parciais de uma função aplicada a blocos de nodos de origem: no processo
+        atual (processes = 1) ou num conjunto de processos, para o qual o grafo é enviado uma única vez.
+        Os resultados são devolvidos à medida que ficam disponíveis (por qualquer ordem)
+
+        Parameters
+        ----------
+        :param worker: Função (ao nível do módulo) executada nos processos auxiliares
+        :param local: Método equivalente executado no processo atual
+        :param sources: Lista de identificadores inteiros dos nodos de origem
+        :param processes: Número de processos (None usa o número de CPUs; 1 calcula no processo atual)
+        :param chunksize: Número de nodos de origem por tarefa
+        """
+        if processes is None:
+            processes = os.cpu_count() or 1
+        if processes == 1 or len(sources) < 2:
+            yield local(sources)
+            return
+        if chunksize is None:
+            chunksize = max(1, len(sources) // (processes * 8))
+        chunks = [sources[i:i + chunksize] for i in range(0, len(sources), chunksize)]
+        with ProcessPoolExecutor(max_workers = processes, initializer = _init_worker, initargs = (self,)) as ex:
+            futures = [ex.submit(worker, c) for c in chunks]
+            for f in as_completed(futures):
+                yield f.result()
+
+
+    def all_pairs_stats(self, processes:int = None, chunksize:int = None, probe = None) -> dict:
+        """
+        Calcula estatísticas das distâncias entre todos os pares de nodos: distância média,
+        fração de pares atingíveis e histograma das distâncias. Os nodos de origem são
+        divididos por um conjunto de processos (o grafo é enviado uma única vez a cada processo)
+        e as somas parciais são agregadas à medida que ficam disponíveis
+
+        Parameters
+        ----------
+        :param processes: Número de processos (None usa o número de CPUs; 1 calcula no processo atual)
+        :param chunksize: Número de nodos de origem por tarefa
+        :param probe: GraphProbe onde são registados os nodos visitados e os arcos percorridos (opcional)
+        """
+        n = len(self.nodes)
+        tot = count = 0
+        hist = {}
+        count = probe is not None
+        worker = functools.partial(_worker_distance_stats, count = count)
+        local = functools.partial(self._distance_stats, count = count)
+        for t, c, h, nv, ne in self._map_sources(worker, local, range(n), processes, chunksize):
+            tot += t
+            count += c
+            for d, k in h.items():
+                hist[d] = hist.get(d, 0) + k
+            if probe is not None:
+                probe.visit(nv, ne)
+        return {"mean_distance": (tot / count) if count > 0 else None,
+                "reachable_fraction": (count / (n * (n - 1))) if n > 1 else 0.0,
+                "pairs": count,
+                "histogram": dict(sorted(hist.items()))}
+
+
+    ## betweenness centrality
+
+    def _betweenness_partial(self, sources, count:bool = False) -> tuple:
+        """
+        Algoritmo de Brandes: soma, para cada nodo, as dependências dos nodos de origem especificados
+        (fração dos caminhos mais curtos que passam pelo nodo). Cada origem requer uma BFS (ou Dijkstra,
+        se o grafo tem pesos, ver _weighted_path_counts) com contagem do número de caminhos mais curtos,
+        seguida da acumulação das dependências pela ordem inversa, em O(V+E) (O(E log V) com pesos).
+        Devolve um tuplo (dependências de cada nodo, nodos visitados, arcos percorridos)
+
+        Parameters
+        ----------
+        :param sources: Iterável de identificadores inteiros dos nodos de origem
+        :param count: Se True, conta os nodos visitados e os arcos percorridos (caso contrário, são 0)
+        """
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        n = len(self.nodes)
+        bc = [0.0] * n
+        visits = edges = 0
+        degree = self._out_degrees().__getitem__ if count else None
+        positive = weights is not None and all(w > 0 for w in weights)
+        for s in sources:
+            if weights is None:
+                sigma = {s: 1}
+                preds = {s: []}
+                order = [] #Nodos por ordem não decrescente de distância
+                dist = {s: 0}
+                frontier = [s]
+                level = 0
+                while frontier: #BFS por níveis
+                    order.extend(frontier)
+                    level += 1
+                    nxt = []
+                    for u in frontier:
+                        sigma_u = sigma[u]
+                        for t in targets[offsets[u]:offsets[u + 1]]:
+                            d_t = dist.get(t)
+                            if d_t is None:
+                                dist[t] = level
+                                sigma[t] = sigma_u
+                                preds[t] = [u]
+                                nxt.append(t)
+                            elif d_t == level:
+                                sigma[t] += sigma_u
+                                preds[t].append(u)
+                    frontier = nxt
+            else:
+                sigma, preds, order = self._weighted_path_counts(s, positive)
+            if count:
+                visits += len(order)
+                edges += sum(map(degree, order))
+            delta = dict.fromkeys(order, 0.0)
+            for w in reversed(order):
+                coeff = (1.0 + delta[w]) / sigma[w]
+                for v in preds[w]:
+                    delta[v] += sigma[v] * coeff
+                if w != s:
+                    bc[w] += delta[w]
+        return bc, visits, edges
+
+
+    def _weighted_path_counts(self, s:int, positive:bool = False) -> tuple:
+        """
+        Contagem dos caminhos mais curtos a partir de um nodo num grafo com pesos (ver _betweenness_partial).
+        As distâncias são calculadas primeiro (Dijkstra) e os caminhos contados depois, por ordem topológica
+        do grafo dos caminhos mais curtos: com arcos de peso 0, vários nodos têm a mesma distância e um nodo
+        pode ser fixado pelo Dijkstra antes de um dos seus antecessores. Os arcos de ciclos de peso 0 (com
+        um número infinito de caminhos mais curtos) que fecham o ciclo são ignorados.
+        Devolve um tuplo (número de caminhos, antecessores, nodos por ordem topológica)
+
+        Parameters
+        ----------
+        :param s: Identificador inteiro do nodo de origem
+        :param positive: True se todos os pesos são positivos (a ordem do Dijkstra já é topológica)
+        """
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        dist = {}
+        found = [] #Nodos pela ordem em que são fixados
+        seen = {s: 0}
+        heap = [(0, s)]
+        while heap:
+            d_u, u = heapq.heappop(heap)
+            if u in dist:
+                continue
+            dist[u] = d_u
+            found.append(u)
+            for j in range(offsets[u], offsets[u + 1]):
+                t = targets[j]
+                nd = d_u + weights[j]
+                if t not in dist and (t not in seen or nd < seen[t]):
+                    seen[t] = nd
+                    heapq.heappush(heap, (nd, t))
+        
+        #Grafo dos caminhos mais curtos (arcos u -> t com dist[u] + peso == dist[t])
+        preds = {u: [] for u in found}
+        for u in found:
+            d_u = dist[u]
+            for j in range(offsets[u], offsets[u + 1]):
+                t = targets[j]
+                if t != s and t != u and d_u + weights[j] == dist[t]:
+                    preds[t].append(u)
+        
+        sigma = dict.fromkeys(found, 0)
+        sigma[s] = 1
+        if positive: #Os antecessores de cada nodo foram fixados antes dele
+            for t in found:
+                for u in preds[t]:
+                    sigma[t] += sigma[u]
+            return sigma, preds, found
+        
+        succs = {u: [] for u in found}
+        indeg = dict.fromkeys(found, 0)
+        for t in found:
+            indeg[t] = len(preds[t])
+            for u in preds[t]:
+                succs[u].append(t)
+        order = []
+        done = set()
+        queue = deque([s])
+        pos = 0
+        while len(order) < len(found):
+            if not queue: #Ciclo de peso 0: o nodo fixado primeiro ignora os antecessores ainda por processar
+                while found[pos] in done:
+                    pos += 1
+                v = found[pos]
+                preds[v] = [p for p in preds[v] if p in done]
+                queue.append(v)
+            u = queue.popleft()
+            done.add(u)
+            order.append(u)
+            for t in succs[u]:
+                if t in done:
+                    continue
+                sigma[t] += sigma[u]
+                indeg[t] -= 1
+                if indeg[t] == 0:
+                    queue.append(t)
+        return sigma, preds, order
+
+
+    def betweenness(self, sources = None, processes:int = None, chunksize:int = None, probe = None) -> list:
+        """
+        Devolve a lista das centralidades de intermediação (não normalizadas) de cada nodo, indexada
+        pelos identificadores inteiros, somando as dependências dos nodos de origem especificados.
+        As origens podem ser divididas por um conjunto de processos (ver all_pairs_stats)
+
+        Parameters
+        ----------
+        :param sources: Identificadores inteiros dos nodos de origem (None para todos os nodos)
+        :param processes: Número de processos (None usa o número de CPUs; 1 calcula no processo atual)
+        :param chunksize: Número de nodos de origem por tarefa
+        :param probe: GraphProbe onde são registados os nodos visitados e os arcos percorridos (opcional)
+        """
+        n = len(self.nodes)
+        sources = list(range(n)) if sources is None else list(sources)
+        bc = [0.0] * n
+        count = probe is not None
+        worker = functools.partial(_worker_betweenness, count = count)
+        local = functools.partial(self._betweenness_partial, count = count)
+        for part, nv, ne in self._map_sources(worker, local, sources, processes, chunksize):
+            for i, x in enumerate(part):
+                bc[i] += x
+            if probe is not None:
+                probe.visit(nv, ne)
+        return bc
+
+
+## funções executadas nos processos auxiliares (têm de estar ao nível do módulo)
+
+_worker_graph = None
+
+def _init_worker(csr:CSRGraph):
+    """
+    Guarda o grafo no processo auxiliar (é enviado uma única vez, na criação do processo)
+
+    Parameters
+    ----------
+    :param csr: Grafo em formato CSR
+    """
+    global _worker_graph
+    _worker_graph = csr
+
+
+def _worker_distance_stats(sources, count:bool = False) -> tuple:
+    """
+    Calcula as somas parciais das distâncias no processo auxiliar (ver _distance_stats)
+
+    Parameters
+    ----------
+    :param sources: Identificadores inteiros dos nodos de origem
+    :param count: Se True, conta os nodos visitados e os arcos percorridos
+    """
+    return _worker_graph._distance_stats(sources, count)
+
+
+def _worker_betweenness(sources, count:bool = False) -> tuple:
+    """
+    Calcula as dependências parciais (algoritmo de Brandes) no processo auxiliar (ver _betweenness_partial)
+
+    Parameters
+    ----------
+    :param sources: Identificadores inteiros dos nodos de origem
+    :param count: Se True, conta os nodos visitados e os arcos percorridos
+    """
+    return _worker_graph._betweenness_partial(sources, count)
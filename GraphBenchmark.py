@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+"""
+Class: GraphBenchmark
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+from MyGraph import MyGraph
+from MetabolicNetwork import MetabolicNetwork
+from GraphGenerator import GraphGenerator
+
+
+class GraphBenchmark:
+
+    """
+    Mede o desempenho das operações de MyGraph e MetabolicNetwork sobre grafos sintéticos
+    (construção, procuras, Dijkstra, ciclos, graus, clustering e distâncias entre todos os pares),
+    produzindo resultados em JSON que podem ser comparados com uma referência guardada
+    """
+
+    def __init__(self, sizes:tuple = (500, 2000), seed:int = 42, repeat:int = 3, sources:int = 20):
+        """
+        Guarda a configuração do benchmark
+
+        Parameters
+        ----------
+        :param sizes: Números de nodos dos grafos gerados
+        :param seed: Semente dos geradores (os grafos são os mesmos em todas as execuções)
+        :param repeat: Número de repetições de cada medição (é guardado o melhor tempo)
+        :param sources: Número de nodos de origem usados nas procuras
+        """
+        self.sizes = sizes
+        self.seed = seed
+        self.repeat = repeat
+        self.sources = sources
+
+
+    def _time(self, func) -> float:
+        """
+        Devolve o melhor tempo (em segundos) de 'repeat' execuções da função
+
+        Parameters
+        ----------
+        :param func: Função sem argumentos a medir
+        """
+        best = float("inf")
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+
+    def run(self) -> dict:
+        """
+        Executa todas as medições e devolve um dicionário com os metadados da execução e
+        os tempos de cada caso ({"nome": segundos})
+        """
+        results = {}
+        for n in self.sizes:
+            gen = GraphGenerator(self.seed)
+            er = gen.erdos_renyi(n, 4.0 / n, weighted = True)
+            ba = gen.barabasi_albert(n, 2)
+            lines = gen.reaction_lines(n, max(1, (2 * n) // 3))
+            srcs = er.get_nodes()[:self.sources]
+            edges = er.get_edges()
+
+            results[f"er-{n}/construction"] = self._time(lambda: MyGraph.from_edges(edges, weighted = True))
+            results[f"er-{n}/bfs"] = self._time(lambda: [er.reachable_bfs(v) for v in srcs])
+            results[f"er-{n}/dfs"] = self._time(lambda: [er.reachable_dfs(v) for v in srcs])
+            results[f"er-{n}/dijkstra"] = self._time(lambda: [er.dijkstra_tree(v) for v in srcs])
+            results[f"er-{n}/has_cycle"] = self._time(er.has_cycle)
+            results[f"ba-{n}/bfs"] = self._time(lambda: [ba.reachable_bfs(v) for v in srcs])
+            results[f"ba-{n}/distance"] = self._time(lambda: [ba.distance(v, n - 1) for v in srcs])
+            results[f"ba-{n}/degrees"] = self._time(lambda: [ba.degree(v) for v in ba.get_nodes()])
+
+            net = MetabolicNetwork("metabolite-reaction")
+            net.load_from_lines(lines)
+            results[f"metabolic-{n}/load"] = self._time(lambda: MetabolicNetwork().load_from_lines(lines))
+            results[f"metabolic-{n}/degrees"] = self._time(lambda: net.prob_degree("inout"))
+            results[f"metabolic-{n}/in_degrees"] = self._time(lambda: net.all_degrees("in"))
+            results[f"metabolic-{n}/clustering"] = self._time(net.mean_clustering_coef)
+            results[f"metabolic-{n}/all_pairs"] = self._time(lambda: net.mean_distances())
+        return {"meta": {"sizes": list(self.sizes), "seed": self.seed, "repeat": self.repeat,
+                         "python": platform.python_version(), "machine": platform.machine()},
+                "results": results}
+
+
+    @staticmethod
+    def compare(current:dict, baseline:dict, tolerance:float = 0.25) -> list:
+        """
+        Compara os resultados com uma referência e devolve a lista das regressões, tuplos
+        (caso, tempo de referência, tempo atual, razão), para os casos cujo tempo aumentou
+        mais do que a tolerância
+
+        Parameters
+        ----------
+        :param current: Resultados atuais (devolvidos por run())
+        :param baseline: Resultados de referência
+        :param tolerance: Aumento relativo tolerado (0.25 = 25%)
+        """
+        regressions = []
+        base = baseline["results"]
+        for name, t in current["results"].items():
+            if name in base and base[name] > 0 and t > base[name] * (1 + tolerance):
+                regressions.append((name, base[name], t, round(t / base[name], 2)))
+        return regressions
+
+
+def main(argv:list = None) -> int:
+    """
+    Executa o benchmark a partir da linha de comandos. Devolve 1 se forem detetadas regressões
+
+    Parameters
+    ----------
+    :param argv: Argumentos da linha de comandos (por defeito, sys.argv)
+    """
+    parser = argparse.ArgumentParser(description = "Benchmark de MyGraph/MetabolicNetwork")
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [500, 2000], help = "Números de nodos")
+    parser.add_argument("--seed", type = int, default = 42)
+    parser.add_argument("--repeat", type = int, default = 3)
+    parser.add_argument("--out", help = "Ficheiro JSON onde guardar os resultados")
+    parser.add_argument("--baseline", help = "Ficheiro JSON de referência para detetar regressões")
+    parser.add_argument("--tolerance", type = float, default = 0.25, help = "Aumento relativo tolerado")
+    args = parser.parse_args(argv)
+
+    results = GraphBenchmark(tuple(args.sizes), args.seed, args.repeat).run()
+    if args.out:
+        with open(args.out, "w") as wf:
+            json.dump(results, wf, indent = 2)
+    else:
+        json.dump(results, sys.stdout, indent = 2)
+        print()
+    if args.baseline:
+        with open(args.baseline) as rf:
+            baseline = json.load(rf)
+        regressions = GraphBenchmark.compare(results, baseline, args.tolerance)
+        for name, old, new, ratio in regressions:
+            print(f"REGRESSION {name}: {old:.6f}s -> {new:.6f}s (x{ratio})", file = sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
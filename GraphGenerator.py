@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""
+Class: GraphGenerator
+"""
+
+import math
+import random
+
+from MyGraph import MyGraph
+from MetabolicNetwork import MetabolicNetwork
+
+
+class GraphGenerator:
+
+    """
+    Gera grafos sintéticos (Erdős–Rényi, Barabási–Albert e redes metabólicas bipartidas)
+    de forma reprodutível a partir de uma semente
+    """
+
+    def __init__(self, seed:int = None):
+        """
+        Inicializa o gerador de números aleatórios
+
+        Parameters
+        ----------
+        :param seed: Semente do gerador aleatório (None para não fixar)
+        """
+        self.rng = random.Random(seed)
+
+
+    def _weight(self, weighted:bool, max_weight:int):
+        """
+        Devolve o peso de um novo arco (inteiro entre 1 e max_weight) ou None se o grafo não tem pesos
+
+        Parameters
+        ----------
+        :param weighted: Booleano que indica se grafo tem pesos
+        :param max_weight: Peso máximo
+        """
+        return self.rng.randint(1, max_weight) if weighted else None
+
+
+    def erdos_renyi(self, n:int, p:float, weighted:bool = False, max_weight:int = 10) -> MyGraph:
+        """
+        Gera um grafo dirigido aleatório G(n, p): cada um dos n*(n-1) arcos possíveis existe com
+        probabilidade p. Os arcos são sorteados por saltos geométricos, em O(n + arcos)
+
+        Parameters
+        ----------
+        :param n: Número de nodos (identificados por 0..n-1)
+        :param p: Probabilidade de cada arco
+        :param weighted: Se True, atribui a cada arco um peso inteiro entre 1 e max_weight
+        :param max_weight: Peso máximo dos arcos
+        """
+        if type(n) != int or n < 0:
+            raise ValueError("O parâmetro 'n' deve ser um inteiro não negativo")
+        if not 0 <= p <= 1:
+            raise ValueError("O parâmetro 'p' deve estar entre 0 e 1")
+        graph = {v: {} for v in range(n)}
+        total = n * (n - 1)
+        if p > 0 and total > 0:
+            log_q = math.log(1 - p) if p < 1 else None
+            k = -1
+            while True:
+                #Salto até ao próximo arco presente (distribuição geométrica)
+                k += 1 if log_q is None else 1 + int(math.log(1 - self.rng.random()) / log_q)
+                if k >= total:
+                    break
+                u, j = divmod(k, n - 1)
+                v = j if j < u else j + 1 #Sem lacetes
+                graph[u][v] = self._weight(weighted, max_weight)
+        return MyGraph(graph, weighted)
+
+
+    def barabasi_albert(self, n:int, m:int, weighted:bool = False, max_weight:int = 10) -> MyGraph:
+        """
+        Gera um grafo livre de escala pelo modelo de Barabási–Albert: cada novo nodo liga-se a m
+        nodos existentes, escolhidos com probabilidade proporcional ao seu grau. Como o modelo é
+        não dirigido, cada ligação é representada pelos dois arcos
+
+        Parameters
+        ----------
+        :param n: Número de nodos (identificados por 0..n-1)
+        :param m: Número de ligações de cada novo nodo
+        :param weighted: Se True, atribui a cada ligação um peso inteiro entre 1 e max_weight
+        :param max_weight: Peso máximo das ligações
+        """
+        if type(m) != int or m < 1 or n <= m:
+            raise ValueError("Os parâmetros devem verificar 1 <= m < n")
+        graph = {v: {} for v in range(n)}
+        pool = list(range(m)) #Cada nodo aparece uma vez por cada ligação (mais uma inicial)
+        for v in range(m, n):
+            chosen = set()
+            while len(chosen) < m:
+                chosen.add(self.rng.choice(pool))
+            for t in sorted(chosen):
+                w = self._weight(weighted, max_weight)
+                graph[v][t] = w
+                graph[t][v] = w
+            pool.extend(chosen)
+            pool.extend([v] * m)
+        return MyGraph(graph, weighted)
+
+
+    def reaction_lines(self, n_metabolites:int, n_reactions:int, max_substrates:int = 3,
+                       max_products:int = 3, reversible:float = 0.3) -> list:
+        """
+        Gera reações metabólicas aleatórias no formato aceite por MetabolicNetwork.load_from_lines
+        ("R1: M1 + M2 => M3"). Os metabolitos de cada reação são escolhidos por ligação preferencial,
+        pelo que surgem metabolitos muito ligados (como H2O ou ATP nas redes reais)
+
+        Parameters
+        ----------
+        :param n_metabolites: Número de metabolitos
+        :param n_reactions: Número de reações
+        :param max_substrates: Número máximo de substratos por reação
+        :param max_products: Número máximo de produtos por reação
+        :param reversible: Fração esperada de reações reversíveis
+        """
+        if n_metabolites < max_substrates + max_products:
+            raise ValueError("O número de metabolitos deve ser pelo menos max_substrates + max_products")
+        rng = self.rng
+        pool = list(range(1, n_metabolites + 1))
+        lines = []
+        for r in range(1, n_reactions + 1):
+            n_subs = rng.randint(1, max_substrates)
+            n_prods = rng.randint(1, max_products)
+            chosen = []
+            while len(chosen) < n_subs + n_prods:
+                m = rng.choice(pool)
+                if m not in chosen: chosen.append(m)
+            pool.extend(chosen)
+            subs = " + ".join(f"M{m}" for m in chosen[:n_subs])
+            prods = " + ".join(f"M{m}" for m in chosen[n_subs:])
+            arrow = "<=>" if rng.random() < reversible else "=>"
+            lines.append(f"R{r}: {subs} {arrow} {prods}")
+        return lines
+
+
+    def metabolic_network(self, n_metabolites:int, n_reactions:int, network_type:str = "metabolite-reaction",
+                          split_rev:bool = False, **kwargs) -> MetabolicNetwork:
+        """
+        Gera uma rede metabólica aleatória (ver reaction_lines)
+
+        Parameters
+        ----------
+        :param n_metabolites: Número de metabolitos
+        :param n_reactions: Número de reações
+        :param network_type: Tipo de rede metabólica a construir
+        :param split_rev: Booleano que define se as reações reversíveis são consideradas como 2 reações distintas
+        :param kwargs: Restantes parâmetros de reaction_lines
+        """
+        net = MetabolicNetwork(network_type, split_rev)
+        net.load_from_lines(self.reaction_lines(n_metabolites, n_reactions, **kwargs))
+        return net
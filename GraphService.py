@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+
+"""
+Classes: GraphServer, GraphClient
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import threading
+
+from MetabolicNetwork import MetabolicNetwork
+
+
+class GraphServer:
+
+    """
+    Serviço residente que carrega uma ou mais redes metabólicas uma única vez e responde a consultas
+    (atingibilidade, distâncias, caminhos, graus e expansão da rede) recebidas por um socket local
+    (Unix ou TCP em localhost). O protocolo é de uma mensagem JSON por linha:
+    pedido {"id": ..., "net": nome, "op": operação, "args": [...]} e resposta {"id": ..., "result": ...}
+    ou {"id": ..., "error": mensagem}. As consultas são apenas de leitura e são executadas num conjunto
+    de threads, pelo que vários clientes podem ser servidos em simultâneo
+    """
+
+    #Operações disponíveis: nome no protocolo -> método da rede
+    OPS = {"reachable": "reachable_bfs",
+           "reachable_bfs": "reachable_bfs",
+           "reachable_dfs": "reachable_dfs",
+           "distance": "distance",
+           "shortest_path": "shortest_path",
+           "dijkstra": "dijkstra",
+           "k_shortest_paths": "k_shortest_paths",
+           "successors": "get_successors",
+           "predecessors": "get_predecessors",
+           "degree": "degree",
+           "in_degree": "in_degree",
+           "out_degree": "out_degree",
+           "all_degrees": "all_degrees",
+           "metabolitos_finais": "metabolitos_finais"}
+
+    def __init__(self, networks:dict = None, host:str = "127.0.0.1", port:int = 0, path:str = None):
+        """
+        Guarda as redes a servir e o endereço do socket
+
+        Parameters
+        ----------
+        :param networks: Dicionário {nome: MetabolicNetwork} com as redes já carregadas
+        :param host: Endereço TCP (apenas localhost é recomendado, o serviço não tem autenticação)
+        :param port: Porta TCP (0 escolhe uma porta livre, ver 'address')
+        :param path: Caminho de um socket Unix (se especificado, é usado em vez de TCP)
+        """
+        self.networks = dict(networks) if networks else {}
+        self.host = host
+        self.port = port
+        self.path = path
+        self.address = None #Endereço efetivo, definido por start()
+        self._server = None
+        self._loop = None
+        self._thread = None
+
+
+    def load(self, name:str, filename:str, network_type:str = "metabolite-reaction", split_rev:bool = False):
+        """
+        Carrega uma rede metabólica a partir de um ficheiro e disponibiliza-a com o nome especificado
+
+        Parameters
+        ----------
+        :param name: Nome da rede nas consultas
+        :param filename: Ficheiro com as reações (ver MetabolicNetwork.load_from_file)
+        :param network_type: Tipo de rede metabólica a construir
+        :param split_rev: Booleano que define se as reações reversíveis são consideradas como 2 reações distintas
+        """
+        net = MetabolicNetwork(network_type, split_rev)
+        net.load_from_file(filename)
+        self.networks[name] = net
+        return net
+
+
+    def _execute(self, request:dict):
+        """
+        Executa uma consulta e devolve o resultado (lança uma exceção se o pedido não for válido)
+
+        Parameters
+        ----------
+        :param request: Pedido descodificado
+        """
+        op = request.get("op")
+        if op == "networks":
+            return {name: net.net_type for name, net in self.networks.items()}
+        if op == "ping":
+            return "pong"
+        if op not in self.OPS:
+            raise ValueError(f"Operação desconhecida: {op}")
+        name = request.get("net")
+        if name is None and len(self.networks) == 1:
+            name = next(iter(self.networks))
+        if name not in self.networks:
+            raise ValueError(f"Rede desconhecida: {name}")
+        args = request.get("args", [])
+        if type(args) != list:
+            raise ValueError("O campo 'args' deve ser uma lista")
+        return getattr(self.networks[name], self.OPS[op])(*args)
+
+
+    async def _handle(self, reader, writer):
+        """
+        Atende um cliente: lê os pedidos linha a linha e escreve as respostas pela mesma ordem
+
+        Parameters
+        ----------
+        :param reader: Stream de leitura da ligação
+        :param writer: Stream de escrita da ligação
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e: #Ligação fechada (possivelmente sem o último '\n')
+                    line = e.partial
+                except asyncio.LimitOverrunError:
+                    #Pedido maior do que o limite do stream: é descartado até ao fim da linha
+                    await self._discard_line(reader)
+                    response = {"id": None, "error": "ValueError: Pedido demasiado longo"}
+                    writer.write(json.dumps(response).encode() + b"\n")
+                    await writer.drain()
+                    continue
+                if not line:
+                    break
+                request = {}
+                try:
+                    request = json.loads(line)
+                    if type(request) != dict:
+                        raise ValueError("O pedido deve ser um objeto JSON")
+                    #As consultas podem ser longas: são executadas fora do ciclo de eventos
+                    result = await loop.run_in_executor(None, self._execute, request)
+                    response = {"id": request.get("id"), "result": result}
+                except Exception as e:
+                    response = {"id": request.get("id"), "error": f"{type(e).__name__}: {e}"}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+    @staticmethod
+    async def _discard_line(reader):
+        """
+        Descarta os dados recebidos até ao fim da linha atual (inclusive)
+        
+        Parameters
+        ----------
+        :param reader: Stream de leitura da ligação
+        """
+        while True:
+            try:
+                await reader.readuntil(b"\n")
+                return
+            except asyncio.LimitOverrunError as e:
+                await reader.readexactly(e.consumed)
+            except asyncio.IncompleteReadError:
+                return
+
+
+    async def start(self):
+        """
+        Abre o socket e começa a aceitar ligações (no ciclo de eventos atual). Devolve o endereço efetivo:
+        o caminho do socket Unix ou um tuplo (host, porta)
+        """
+        if self.path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path = self.path)
+            self.address = self.path
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.address = self._server.sockets[0].getsockname()[:2]
+        return self.address
+
+
+    async def serve_forever(self):
+        """
+        Inicia o serviço (se necessário) e atende ligações até ser interrompido
+        """
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+
+    def start_background(self):
+        """
+        Inicia o serviço numa thread própria, com o seu ciclo de eventos, e devolve o endereço efetivo
+        quando este estiver pronto a aceitar ligações (ver stop). Se o serviço não puder ser iniciado,
+        lança a exceção correspondente (p.e. OSError)
+        """
+        ready = threading.Event()
+        failure = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._loop = loop
+            try:
+                loop.run_until_complete(self.start())
+            except BaseException as e: #P.e. o endereço já está em uso: o erro é lançado em start_background
+                failure.append(e)
+                loop.close()
+                return
+            finally:
+                ready.set()
+            try:
+                loop.run_forever()
+            finally:
+                self._server.close()
+                loop.run_until_complete(self._server.wait_closed())
+                loop.close()
+
+        self._thread = threading.Thread(target = run, daemon = True)
+        self._thread.start()
+        ready.wait()
+        if failure:
+            self._thread.join()
+            self._thread = self._loop = None
+            raise failure[0]
+        return self.address
+
+
+    def stop(self):
+        """
+        Termina o serviço iniciado por start_background
+        """
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+
+class GraphClient:
+
+    """
+    Cliente síncrono do GraphServer: envia consultas JSON por uma ligação persistente
+    """
+
+    def __init__(self, host:str = "127.0.0.1", port:int = None, path:str = None, timeout:float = None):
+        """
+        Liga-se ao serviço
+
+        Parameters
+        ----------
+        :param host: Endereço TCP do serviço
+        :param port: Porta TCP do serviço
+        :param path: Caminho do socket Unix do serviço (usado em vez de TCP se especificado)
+        :param timeout: Tempo máximo de espera por cada resposta, em segundos (None espera indefinidamente)
+        """
+        if path is not None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(path)
+        elif port is not None:
+            self.sock = socket.create_connection((host, port), timeout = timeout)
+        else:
+            raise ValueError("É preciso especificar a porta ou o caminho do socket do serviço")
+        self._file = self.sock.makefile("rb")
+        self._next_id = 0
+
+
+    def query(self, op:str, *args, net:str = None):
+        """
+        Envia uma consulta e devolve o resultado. Lança RuntimeError se o serviço devolver um erro
+
+        Parameters
+        ----------
+        :param op: Operação (ver GraphServer.OPS, "networks" ou "ping")
+        :param args: Argumentos da operação
+        :param net: Nome da rede (opcional se o serviço tiver uma única rede)
+        """
+        self._next_id += 1
+        request = {"id": self._next_id, "op": op, "args": list(args)}
+        if net is not None:
+            request["net"] = net
+        self.sock.sendall(json.dumps(request).encode() + b"\n")
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("O serviço fechou a ligação")
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+
+    def networks(self) -> dict:
+        """
+        Devolve as redes disponíveis no serviço ({nome: tipo de rede})
+        """
+        return self.query("networks")
+
+
+    def close(self):
+        """
+        Fecha a ligação ao serviço
+        """
+        self._file.close()
+        self.sock.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv:list = None) -> int:
+    """
+    Inicia o serviço a partir da linha de comandos, p.e.:
+    python GraphService.py --net ecoli=ecoli.txt --net ecoli_mm=ecoli.txt:metabolite-metabolite --port 8765
+
+    Parameters
+    ----------
+    :param argv: Argumentos da linha de comandos (por defeito, sys.argv)
+    """
+    parser = argparse.ArgumentParser(description = "Serviço de consultas sobre redes metabólicas")
+    parser.add_argument("--net", action = "append", required = True,
+                        help = "Rede a carregar, no formato nome=ficheiro[:tipo de rede]")
+    parser.add_argument("--split-rev", action = "store_true", help = "Separa as reações reversíveis")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8765)
+    parser.add_argument("--unix", help = "Caminho de um socket Unix (em vez de TCP)")
+    args = parser.parse_args(argv)
+
+    server = GraphServer(host = args.host, port = args.port, path = args.unix)
+    for spec in args.net:
+        name, _, rest = spec.partition("=")
+        filename, _, net_type = rest.partition(":")
+        server.load(name, filename, net_type or "metabolite-reaction", args.split_rev)
+
+    async def run():
+        address = await server.start()
+        print(f"A servir {', '.join(server.networks)} em {address}", file = sys.stderr)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
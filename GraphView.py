@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""
+Class: SubgraphAdjacency
+"""
+
+from collections.abc import Mapping
+
+
+class _FilteredNeighbours(Mapping):
+
+    """
+    Vista (sem cópia) do dicionário de vizinhos de um nodo, restrita a um conjunto de nodos
+    """
+
+    __slots__ = ("adj", "nodes")
+
+    def __init__(self, adj:dict, nodes:set):
+        self.adj = adj
+        self.nodes = nodes
+
+    def __getitem__(self, k):
+        if k not in self.nodes:
+            raise KeyError(k)
+        return self.adj[k]
+
+    def __contains__(self, k):
+        return k in self.nodes and k in self.adj
+
+    def __iter__(self):
+        nodes = self.nodes
+        return (k for k in self.adj if k in nodes)
+
+    def __len__(self):
+        nodes = self.nodes
+        return sum(1 for k in self.adj if k in nodes)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class SubgraphAdjacency(Mapping):
+
+    """
+    Vista (sem cópia) de uma lista de adjacência ({nodo: {vizinho: peso}}) restrita a um conjunto
+    de nodos: os nodos e os arcos são filtrados no momento do acesso, pelo que alterações ao
+    grafo original ficam visíveis na vista
+    """
+
+    __slots__ = ("adj", "nodes", "order")
+
+    def __init__(self, adj:dict, nodes):
+        """
+        Guarda a lista de adjacência original e o conjunto de nodos da vista
+
+        Parameters
+        ----------
+        :param adj: Lista de adjacência original
+        :param nodes: Iterável com os nodos a manter (os que não existem no grafo são ignorados)
+        """
+        self.adj = adj
+        self.order = [v for v in dict.fromkeys(nodes) if v in adj] #Sem repetições, pela ordem dada
+        self.nodes = set(self.order)
+
+    def __getitem__(self, v):
+        if v not in self.nodes:
+            raise KeyError(v)
+        return _FilteredNeighbours(self.adj[v], self.nodes)
+
+    def __contains__(self, v):
+        return v in self.nodes
+
+    def __iter__(self):
+        return iter(self.order)
+
+    def __len__(self):
+        return len(self.order)
+
+    def __repr__(self):
+        return repr({v: self[v] for v in self.order})
@@ -1,6 +1,20 @@
 # -*- coding: utf-8 -*-
 
-from MyGraph import MyGraph
+import math
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from MyGraph import MyGraph, instrumented
+
+try:
+    import numpy as np
+except ImportError: #O NumPy é opcional (necessário para as centralidades e as análises em lote; acelera as projeções)
+    np = None
+
+_projection_lock = threading.Lock() #Serializa o cálculo das projeções pendentes (ver _materialize_projection)
 
 """
 Class: MetabolicNetwork
@@ -11,7 +25,9 @@ class MetabolicNetwork (MyGraph):
     Classe que guarda redes metabólicas em estruturas de grafos
     """
     
-    def __init__(self, network_type:str = "metabolite-reaction", split_rev:bool = False):
+    _pending = None #Rede metabolito-reação cuja projeção ainda não foi calculada (ver __getattr__)
+    
+    def __init__(self, network_type:str = "metabolite-reaction", split_rev:bool = False, currency:list = None):
         """
         Guarda as variáveis a serem utilizadas pela classe
         
@@ -19,6 +35,8 @@ class MetabolicNetwork (MyGraph):
         ----------
         :param network_type: String que define o tipo de rede metabólica a ser representada
         :param split_rev: Booleano que define se as reações reversíveis são consideradas como 2 reações distintas ou não
+        :param currency: Metabolitos excluídos das projeções 'metabolite-metabolite' e 'reaction-reaction'
+        (metabolitos muito ligados, como H2O ou ATP, que ligam quase todos os nodos entre si)
         """
         assert network_type.lower() in ["metabolite-reaction", "metabolite-metabolite", "reaction-reaction"],\
             "Parâmetro ´network_type' tem de ser 'metabolite-reaction', 'metabolite-metabolite' ou 'reaction-reaction'"
@@ -29,7 +47,50 @@ class MetabolicNetwork (MyGraph):
         self.node_types = {}
         for tp in network_type.lower().split("-"):
             self.node_types[tp] = []
+        self._node_type_of = {} #Registo {nodo: tipo}, para verificar repetições em O(1)
         self.split_rev =  split_rev
+        self.parse_stats = None #Estatísticas da última leitura de reações (ver load_from_lines)
+        self.stoichiometry = None #Triplos da matriz estequiométrica lidos das reações (ver stoichiometric_matrix)
+        self.currency = set(currency) if currency else set()
+    
+    
+    def __getattr__(self, name:str):
+        """
+        Chamado apenas quando um atributo não existe: enquanto a projeção de uma rede 'metabolite-metabolite'
+        ou 'reaction-reaction' está pendente, 'graph' e 'rev_graph' não estão definidos e são calculados no
+        primeiro acesso (depois disso são atributos normais, sem custo adicional nos acessos seguintes)
+        
+        Parameters
+        ----------
+        :param name: Nome do atributo
+        """
+        if name in ("graph", "rev_graph"):
+            self._materialize_projection()
+            if name in self.__dict__:
+                return self.__dict__[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+    
+    
+    @classmethod
+    def from_edges(cls, edges, weighted:bool = False, batch_size:int = 10000, **kwargs) -> "MetabolicNetwork":
+        """
+        Cria uma rede a partir de um iterável de arcos (ver MyGraph.from_edges). Nas redes 'metabolite-metabolite'
+        e 'reaction-reaction', todos os nodos ficam registados com o tipo da rede; numa rede 'metabolite-reaction'
+        o tipo de cada nodo não pode ser deduzido dos arcos e tem de ser definido com add_vertex_type
+        
+        Parameters
+        ----------
+        :param edges: Iterável de tuplos que representam os arcos
+        :param weighted: Booleano que indica se grafo tem pesos (True) ou não (False)
+        :param batch_size: Número de arcos processados por lote
+        :param kwargs: Argumentos do construtor (network_type, split_rev, currency)
+        """
+        net = super().from_edges(edges, weighted, batch_size, **kwargs)
+        if net.net_type != "metabolite-reaction":
+            nodetype = net.net_type.split("-")[0]
+            net.node_types[nodetype] = list(net.graph)
+            net._node_type_of = dict.fromkeys(net.graph, nodetype)
+        return net
     
     
     def add_vertex_type(self, v:str, nodetype:str = None):
@@ -56,13 +117,68 @@ class MetabolicNetwork (MyGraph):
                                          É preciso especificar o tipo do nodo")
         
         #Para garantir que não haja repetições de valores entre metabolitos e reações
-        all_vals = []
-        for vals in self.node_types.values():
-            all_vals.extend(vals)
-        
-        if (v not in all_vals) and (v != ""): #Não aceita valores vazios
-            self.node_types[nodetype].append(v)
+        if (v not in self._node_type_of) and (v != ""): #Não aceita valores vazios
+            vals = self.node_types[nodetype]
             self.add_vertex(v)
+            vals.append(v)
+            self._node_type_of[v] = nodetype
+    
+    
+    def subgraph_view(self, nodes) -> "MetabolicNetwork":
+        """
+        Devolve uma vista (sem cópia) da rede restrita aos nodos especificados, com as listas
+        de nodos por tipo e os coeficientes estequiométricos também restritos a esses nodos
+        
+        Parameters
+        ----------
+        :param nodes: Iterável com os nodos do subgrafo
+        """
+        view = MyGraph.subgraph_view(self, nodes)
+        keep = view.graph.nodes
+        view.node_types = {tp: [v for v in vals if v in keep] for tp, vals in self.node_types.items()}
+        view._node_type_of = {v: tp for v, tp in self._node_type_of.items() if v in keep}
+        if self.stoichiometry is not None:
+            view.stoichiometry = self._restrict_stoichiometry(keep)
+        return view
+    
+    
+    def reversed_view(self) -> "MetabolicNetwork":
+        """
+        Devolve uma vista (sem cópia) da rede com todos os arcos invertidos. Os coeficientes
+        estequiométricos mudam de sinal, para que os substratos e produtos de cada reação
+        correspondam aos arcos da vista (p.e. em StoichiometricMatrix.from_network)
+        """
+        view = MyGraph.reversed_view(self)
+        if self.stoichiometry is not None:
+            view.stoichiometry = dict(self.stoichiometry, values = [-c for c in self.stoichiometry["values"]])
+        return view
+    
+    
+    def _restrict_stoichiometry(self, keep) -> dict:
+        """
+        Devolve os triplos da matriz estequiométrica restritos aos nodos especificados (ver subgraph_view).
+        Só são filtradas as linhas (metabolitos) ou colunas (reações) cujos nodos existem neste tipo de rede;
+        uma reação separada nos 2 sentidos é mantida se algum deles for mantido
+        
+        Parameters
+        ----------
+        :param keep: Conjunto dos nodos mantidos
+        """
+        st = self.stoichiometry
+        mets, reacs = st["metabolites"], st["reactions"]
+        if "metabolite" in self.node_types:
+            mets = [m for m in mets if m in keep]
+        if "reaction" in self.node_types:
+            reacs = [r for r in reacs if r in keep or (self.split_rev and r + "_b" in keep)]
+        m_index = {m: i for i, m in enumerate(mets)}
+        r_index = {r: j for j, r in enumerate(reacs)}
+        entries = [(m_index[st["metabolites"][i]], r_index[st["reactions"][j]], c)
+                   for i, j, c in zip(st["rows"], st["cols"], st["values"])
+                   if st["metabolites"][i] in m_index and st["reactions"][j] in r_index]
+        reversible = dict(zip(st["reactions"], st["reversible"]))
+        return {"metabolites": mets, "reactions": reacs,
+                "rows": [i for i, _, _ in entries], "cols": [j for _, j, _ in entries],
+                "values": [c for _, _, c in entries], "reversible": [reversible[r] for r in reacs]}
     
     
     def get_nodes_type(self, node_type:str = None) -> list:
@@ -89,106 +205,262 @@ class MetabolicNetwork (MyGraph):
             return self.node_types[node_type]
     
     
-    def load_from_file(self, filename:str):
+    def load_from_file(self, filename:str) -> dict:
         """
         Cria um grafo metabólico a partir de um ficheiro contendo reações metabólicas
-        em cada linha
+        em cada linha. Devolve as estatísticas da leitura (ver load_from_lines)
         
         Parameters
         ----------
         :param filename: Nome do ficheiro contendo reações metabólicas
         """
-        rf = open(filename)
+        with open(filename) as rf:
+            return self.load_from_lines(rf)
+    
+    
+    def load_from_lines(self, lines) -> dict:
+        """
+        Cria um grafo metabólico a partir de um iterável de linhas, cada uma com uma reação
+        metabólica (no formato "id: substratos => produtos" ou "id: substratos <=> produtos"), em que
+        cada metabolito pode ser precedido do seu coeficiente estequiométrico ("R1: 2 M1 + M2 => M3").
+        Os coeficientes são guardados em 'stoichiometry' (ver stoichiometric_matrix).
+        As linhas são lidas uma única vez e os arcos inseridos diretamente nas listas de adjacência;
+        as linhas vazias são ignoradas. Devolve (e guarda em 'parse_stats') as estatísticas da leitura:
+        número de linhas, reações, metabolitos e reações reversíveis, metabolitos ignorados na matriz
+        estequiométrica por terem o identificador de uma reação, e o tempo de leitura em segundos
+        
+        Parameters
+        ----------
+        :param lines: Iterável de linhas (p.e. ficheiro aberto ou lista de strings)
+        """
+        start = time.perf_counter()
         gmr = MetabolicNetwork("metabolite-reaction")
-        for line in rf:
-            if ":" in line:
-                tokens = line.split(":")
-                reac_id = tokens[0].strip()
-                gmr.add_vertex_type(reac_id, "reaction")
-                rline = tokens[1]
-            else: raise Exception("Invalid line:")                
+        graph = gmr.graph
+        type_of = gmr._node_type_of
+        metabolites = gmr.node_types["metabolite"]
+        reactions = gmr.node_types["reaction"]
+        split_rev = self.split_rev
+        
+        def add_node(v, nodetype, vals):
+            if v not in type_of and v != "":
+                type_of[v] = nodetype
+                vals.append(v)
+                if v not in graph: graph[v] = {}
+        
+        def parse_side(side, reac_id, sign, reac_b = None) -> list:
+            #Cada metabolito pode ser precedido do seu coeficiente estequiométrico ("2 M_h_c")
+            mets = []
+            for token in side.split("+"):
+                met_id, coef = _parse_species(token)
+                add_node(met_id, "metabolite", metabolites)
+                if reac_b is not None: add_node(reac_b, "reaction", reactions)
+                if met_id != "":
+                    mets.append(met_id)
+                    if type_of[met_id] == "metabolite":
+                        entries.append((met_id, reac_id, sign * coef))
+                    else: #Identificador já usado por uma reação: fica fora da matriz estequiométrica
+                        skipped.append(met_id)
+            return mets
+        
+        entries = [] #Triplos (metabolito, reação, coeficiente) da matriz estequiométrica
+        skipped = [] #Metabolitos com o identificador de uma reação
+        reversible = {} #{reação: reversível} pela ordem de leitura
+        n_lines = n_reactions = n_reversible = 0
+        for line in lines:
+            n_lines += 1
+            if line.strip() == "":
+                continue
+            reac_id, sep, rline = line.partition(":")
+            if not sep:
+                raise Exception(f"Invalid line: {line.strip()}")
+            reac_id = reac_id.strip()
+            add_node(reac_id, "reaction", reactions)
             if "<=>" in rline:
                 left, right = rline.split("<=>")
-                mets_left = left.split("+")
-                for met in mets_left:
-                    met_id = met.strip()
-                    gmr.add_vertex_type(met_id, "metabolite")
-                    if self.split_rev:
-                        gmr.add_vertex_type(reac_id+"_b", "reaction")
-                        gmr.add_edge(met_id, reac_id)
-                        gmr.add_edge(reac_id+"_b", met_id)
-                    else:
-                        gmr.add_edge(met_id, reac_id)
-                        gmr.add_edge(reac_id, met_id)
-                mets_right = right.split("+")
-                for met in mets_right:
-                    met_id = met.strip()
-                    gmr.add_vertex_type(met_id, "metabolite")
-                    if self.split_rev:
-                        gmr.add_edge(met_id, reac_id+"_b")
-                        gmr.add_edge(reac_id, met_id)
-                    else:
-                        gmr.add_edge(met_id, reac_id)
-                        gmr.add_edge(reac_id, met_id)
-                        
-            elif "=>" in line:
+                reac_b = reac_id + "_b" if split_rev else reac_id
+                mets_left = parse_side(left, reac_id, -1, reac_b if split_rev else None)
+                mets_right = parse_side(right, reac_id, 1)
+                for met_id in mets_left:
+                    graph[met_id][reac_id] = None
+                    graph[reac_b][met_id] = None
+                for met_id in mets_right:
+                    graph[met_id][reac_b] = None
+                    graph[reac_id][met_id] = None
+                reversible[reac_id] = True
+                n_reversible += 1
+            elif "=>" in rline:
                 left, right = rline.split("=>")
-                mets_left = left.split("+")
-                for met in mets_left:
-                    met_id = met.strip()
-                    gmr.add_vertex_type(met_id, "metabolite")
-                    gmr.add_edge(met_id, reac_id)
-                mets_right = right.split("+")
-                for met in mets_right:
-                    met_id = met.strip()
-                    gmr.add_vertex_type(met_id, "metabolite")
-                    gmr.add_edge(reac_id, met_id)
-            else: raise Exception("Invalid line:")    
-
+                for met_id in parse_side(left, reac_id, -1):
+                    graph[met_id][reac_id] = None
+                for met_id in parse_side(right, reac_id, 1):
+                    graph[reac_id][met_id] = None
+                reversible.setdefault(reac_id, False)
+            else:
+                raise Exception(f"Invalid line: {line.strip()}")
+            n_reactions += 1
+        gmr._build_predecessors()
+        
         if self.net_type == "metabolite-reaction":
             self.graph = gmr.graph
-        elif self.net_type == "metabolite-metabolite":
-            self._convert_metabolite_net(gmr)
+            self.rev_graph = gmr.rev_graph
+            self.version += 1
+        elif self._pending is None and not self.graph:
+            self._set_pending(gmr) #A projeção é calculada quando o grafo for usado
         else:
-            self._convert_reaction_graph(gmr)
+            self._merge_projection(gmr) #Os arcos da projeção são acrescentados aos que a rede já tem
         
         self.node_types = gmr.node_types
+        self._node_type_of = gmr._node_type_of
+        m_index = {m: i for i, m in enumerate(metabolites)}
+        r_index = {r: i for i, r in enumerate(reversible)}
+        self.stoichiometry = {"metabolites": list(metabolites), "reactions": list(reversible),
+                              "rows": [m_index[m] for m, _, _ in entries],
+                              "cols": [r_index[r] for _, r, _ in entries],
+                              "values": [c for _, _, c in entries],
+                              "reversible": list(reversible.values())}
+        self.parse_stats = {"lines": n_lines, "reactions": n_reactions, "metabolites": len(metabolites),
+                            "reversible": n_reversible, "skipped_species": sorted(set(skipped)),
+                            "seconds": time.perf_counter() - start}
+        return self.parse_stats
         
         
-    def _convert_metabolite_net(self, gmr:dict):
+    def stoichiometric_matrix(self):
         """
-        Converte grafo do tipo 'metabolite-reaction' para 'metabolite-metabolite'
+        Devolve a matriz estequiométrica esparsa (StoichiometricMatrix, metabolitos x reações) com os
+        coeficientes e a reversibilidade lidos das reações (memorizada quando a cache está ativa).
+        As colunas correspondem às reações originais, mesmo que as reversíveis tenham sido separadas
+        """
+        if np is None:
+            raise ImportError("A matriz estequiométrica requer o NumPy")
+        from StoichiometricMatrix import StoichiometricMatrix #Importação local (o módulo requer o NumPy)
+        if self._cache is None:
+            return StoichiometricMatrix.from_network(self)
+        return self._cached(("stoichiometry",), lambda: StoichiometricMatrix.from_network(self))
+    
+    
+    def _snapshot_meta(self) -> dict:
+        """
+        Devolve os metadados guardados no snapshot: tipo da rede, separação das reações
+        reversíveis, metabolitos excluídos das projeções, listas de nodos por tipo e triplos
+        da matriz estequiométrica
+        """
+        meta = MyGraph._snapshot_meta(self)
+        meta.update({"net_type": self.net_type, "split_rev": self.split_rev,
+                     "currency": sorted(self.currency, key = str), "node_types": self.node_types,
+                     "stoichiometry": self.stoichiometry})
+        return meta
+    
+    
+    @classmethod
+    def _from_snapshot(cls, csr, meta:dict) -> "MetabolicNetwork":
+        """
+        Reconstrói a rede metabólica a partir das arrays CSR e dos metadados de um snapshot
         
         Parameters
         ----------
-        :param gmr: Grafo a converter
+        :param csr: Grafo em formato CSR
+        :param meta: Metadados do snapshot
         """
-        for m in gmr.node_types["metabolite"]:
-            self.add_vertex(m)
-            sucs = gmr.get_successors(m)
-            for s in sucs:
-                sucs_r = gmr.get_successors(s)
-                for s2 in sucs_r:
-                    if m != s2: self.add_edge(m, s2) 
-
+        if "net_type" not in meta:
+            raise ValueError("O snapshot não contém uma rede metabólica")
+        net = cls(meta["net_type"], meta["split_rev"], meta.get("currency")) #Snapshots antigos não têm 'currency'
+        net.graph = csr.to_adjacency()
+        net._build_predecessors()
+        net.node_types = meta["node_types"]
+        net._node_type_of = {v: tp for tp, vals in net.node_types.items() for v in vals}
+        net.stoichiometry = meta.get("stoichiometry")
+        return net
+    
+    
+    def projection(self, network_type:str, currency:list = None) -> "MetabolicNetwork":
+        """
+        Devolve a projeção desta rede metabolito-reação numa rede 'metabolite-metabolite' (arco m1 -> m2 se
+        alguma reação consome m1 e produz m2) ou 'reaction-reaction' (arco r1 -> r2 se algum metabolito
+        produzido por r1 é consumido por r2). A projeção só é calculada quando o grafo for usado
         
-    def _convert_reaction_graph(self, gmr:dict): 
+        Parameters
+        ----------
+        :param network_type: Tipo da projeção ('metabolite-metabolite' ou 'reaction-reaction')
+        :param currency: Metabolitos excluídos da projeção (ver __init__)
         """
-        Converte grafo do tipo 'metabolite-reaction' para 'reaction-reaction'
+        if self.net_type != "metabolite-reaction":
+            raise ValueError("As projeções requerem uma rede do tipo 'metabolite-reaction'")
+        if network_type.lower() not in ["metabolite-metabolite", "reaction-reaction"]:
+            raise ValueError("Parâmetro 'network_type' tem de ser 'metabolite-metabolite' ou 'reaction-reaction'")
+        net = MetabolicNetwork(network_type, self.split_rev, currency)
+        #Cópia da rede metabolito-reação: alterações posteriores a esta rede não afetam a projeção pendente
+        gmr = MetabolicNetwork("metabolite-reaction", self.split_rev)
+        gmr.graph = {v: dict(adj) for v, adj in self.graph.items()}
+        gmr.node_types = {tp: list(vals) for tp, vals in self.node_types.items()}
+        net._set_pending(gmr)
+        net.node_types = {tp: list(vals) for tp, vals in self.node_types.items()}
+        net._node_type_of = dict(self._node_type_of)
+        net.stoichiometry = None if self.stoichiometry is None else dict(self.stoichiometry)
+        return net
+    
+    
+    def _set_pending(self, gmr:"MetabolicNetwork"):
+        """
+        Guarda a rede metabolito-reação cuja projeção é calculada no primeiro acesso ao grafo (ver __getattr__)
         
         Parameters
         ----------
-        :param gmr: Grafo a converter
+        :param gmr: Rede metabolito-reação (não deve ser alterada até a projeção ser calculada)
         """
-        for r in gmr.node_types["reaction"]:
-            self.add_vertex(r)
-            sucs = gmr.get_successors(r)
-            for s in sucs:
-                sucs_r = gmr.get_successors(s)
-                for s2 in sucs_r:
-                    if r != s2: self.add_edge(r, s2)
-
+        self.__dict__.pop("graph", None)
+        self.__dict__.pop("rev_graph", None)
+        self._pending = gmr
+        self.version += 1
+    
+    
+    def _project_from(self, gmr:"MetabolicNetwork") -> dict:
+        """
+        Devolve a lista de adjacência da projeção da rede metabolito-reação no tipo desta rede (ver _project)
+        
+        Parameters
+        ----------
+        :param gmr: Rede metabolito-reação
+        """
+        if self.net_type == "metabolite-metabolite":
+            return _project(gmr.graph, gmr.node_types["metabolite"], (), self.currency)
+        return _project(gmr.graph, gmr.node_types["reaction"], self.currency, ())
+    
+    
+    def _materialize_projection(self):
+        """
+        Calcula a projeção pendente e o respetivo índice de antecessores. A projeção é calculada uma única
+        vez mesmo com acessos simultâneos (p.e. nas threads do GraphService): o grafo só é atribuído depois
+        de completo e a projeção só deixa de estar pendente depois de o índice de antecessores estar definido
+        """
+        if self._pending is None:
+            return
+        with _projection_lock:
+            gmr = self._pending
+            if gmr is None: #Calculada entretanto por outra thread
+                return
+            self.graph = self._project_from(gmr)
+            self._build_predecessors()
+            self._pending = None
+    
+    
+    def _merge_projection(self, gmr:"MetabolicNetwork"):
+        """
+        Acrescenta os nodos e arcos da projeção da rede metabolito-reação aos que a rede já tem,
+        pela mesma ordem em que seriam inseridos com add_vertex e add_edge
+        
+        Parameters
+        ----------
+        :param gmr: Rede metabolito-reação
+        """
+        proj = self._project_from(gmr)
+        sources = gmr.node_types["metabolite" if self.net_type == "metabolite-metabolite" else "reaction"]
+        for v in sources:
+            self.add_vertex(v)
+            for t in proj[v]:
+                self.add_edge(v, t)
+    
     
+    @instrumented
     def all_degrees (self, deg_type:str = "inout") -> dict:
         """
         Devolve um dicionário com os graus desejados
@@ -200,19 +472,27 @@ class MetabolicNetwork (MyGraph):
         deg_type = deg_type.lower()
         assert deg_type in ["in","out","inout"], "Parâmetro 'deg_type' deve ser 'in','out','inout'" 
         
-        degs = {}
-        for v in self.graph.keys():
-            if deg_type == "out" or deg_type == "inout":
-                degs[v] = len(self.graph[v])
-            else: degs[v] = 0
-        if deg_type == "in" or deg_type == "inout":
-            for v in self.graph.keys():
-                for d in self.graph[v]:
-                    if deg_type == "in" or v not in self.graph[d]: #Se for "inout", não pode acrescentar repetidos
-                        degs[d] += 1
+        #Graus de entrada lidos no índice de antecessores, sem percorrer todos os arcos do grafo
+        graph = self.graph
+        rev = self.rev_graph
+        if deg_type == "out":
+            degs = {v: len(succ) for v, succ in graph.items()}
+        elif deg_type == "in":
+            degs = {v: len(rev[v]) for v in graph}
+        else:
+            degs = {}
+            for v, succ in graph.items():
+                n = len(succ)
+                for p in rev[v]:
+                    if p not in succ: #Arcos recíprocos só contam uma vez
+                        n += 1
+                degs[v] = n
+        if self._probe is not None: #Só o grau 'inout' percorre arcos (os antecessores de cada nodo)
+            self._probe.visit(len(degs), sum(len(rev[v]) for v in graph) if deg_type == "inout" else 0)
         return degs
 
 
+    @instrumented
     def mean_degree (self, deg_type:str = "inout") -> float:
         """
         Devolve o grau médio que se deseja calcular
@@ -225,6 +505,7 @@ class MetabolicNetwork (MyGraph):
         return round(sum(degs.values()) / float(len(degs)), 4)
     
     
+    @instrumented
     def prob_degree (self, deg_type:str = "inout") -> dict:
         """
         Devolve um dicionário com a probabilidade de cada valor de grau ser encontrado no grafo
@@ -245,22 +526,85 @@ class MetabolicNetwork (MyGraph):
         return res
     
     
-    def mean_distances(self) -> tuple:
+    @instrumented
+    def mean_distances(self, processes:int = 1) -> float:
         """
-        Devolve um tuplo contendo média das distâncias entre cada par de nodos
-        e a proporção de nós atingíveis
+        Devolve a média das distâncias entre cada par de nodos atingíveis
+        (0.0 se não existirem pares atingíveis). Nos grafos com pesos, são usadas as distâncias
+        mínimas (Dijkstra), e não a soma dos pesos ao longo da árvore da procura em largura
+        
+        Parameters
+        ----------
+        :param processes: Número de processos usados no cálculo (None usa o número de CPUs)
         """
-        tot = 0
-        num_reachable = 0
-        for k in self.graph.keys():
-            distsk = self.reachable_with_dist(k)
-            for _, dist in distsk:
-                tot += dist
-            num_reachable += len(distsk)
-        meandist = float(tot) / num_reachable
+        meandist = self.all_pairs_stats(processes)["mean_distance"]
+        if meandist is None:
+            return 0.0
         return round(meandist, 4)
     
     
+    @instrumented
+    def estimate_distances(self, k:int, seed:int = None) -> dict:
+        """
+        Estima as estatísticas de distâncias a partir de uma amostra de k nodos de origem
+        (uma procura em largura por nodo amostrado, ou o algoritmo de Dijkstra se o grafo tiver pesos,
+        como em mean_distances), em vez de percorrer todos os pares.
+        Devolve um dicionário com a distância média estimada, o respetivo erro padrão e
+        intervalo de confiança a 95%, a fração de pares atingíveis e o diâmetro efetivo
+        (percentil 90 das distâncias)
+        
+        Parameters
+        ----------
+        :param k: Número de nodos de origem a amostrar
+        :param seed: Semente do gerador aleatório (para resultados reprodutíveis)
+        """
+        if type(k) != int or k <= 0:
+            raise ValueError("O parâmetro 'k' deve ser um inteiro positivo")
+        nodes = self.get_nodes()
+        n = len(nodes)
+        sources = random.Random(seed).sample(nodes, min(k, n))
+        k = len(sources)
+        
+        totals = [] #Soma das distâncias e número de nodos atingíveis por nodo de origem
+        hist = {}
+        for o in sources:
+            t = c = 0
+            if self.weighted:
+                dists = self.dijkstra_tree(o).dist.items()
+                dists = ((v, dist) for v, dist in dists if v != o)
+            else:
+                dists = self.iter_bfs(o, True)
+            for _, dist in dists:
+                t += dist
+                c += 1
+                hist[dist] = hist.get(dist, 0) + 1
+            totals.append((t, c))
+        tot = sum(t for t, _ in totals)
+        count = sum(c for _, c in totals)
+        if count == 0:
+            return {"mean_distance": None, "std_error": None, "ci95": None, "reachable_fraction": 0.0,
+                    "effective_diameter": None, "sources": k}
+        
+        meandist = tot / count
+        #Erro padrão do estimador de razão (com correção para população finita)
+        std_error = 0.0
+        if k > 1:
+            mean_c = count / k
+            var = sum((t - meandist * c) ** 2 for t, c in totals) / (k - 1)
+            std_error = math.sqrt((1 - k / n) * var / k) / mean_c
+        cum = 0
+        eff_diam = None
+        for dist in sorted(hist):
+            cum += hist[dist]
+            if cum >= 0.9 * count:
+                eff_diam = dist
+                break
+        return {"mean_distance": round(meandist, 4), "std_error": round(std_error, 4),
+                "ci95": (round(meandist - 1.96 * std_error, 4), round(meandist + 1.96 * std_error, 4)),
+                "reachable_fraction": round(count / (k * (n - 1)), 4) if n > 1 else 0.0,
+                "effective_diameter": eff_diam, "sources": k}
+    
+    
     def clustering_coef(self, v:str) -> float:
         """
         Devolve o coeficiente de clustering de um nodo do grafo
@@ -269,6 +613,8 @@ class MetabolicNetwork (MyGraph):
             return 0
         else:
             adjs = self.get_adjacents(v)
+            if self._probe is not None: #Arcos consultados: os do nodo e os testados entre pares de vizinhos
+                self._probe.visit(1, len(self.graph[v]) + len(self.rev_graph[v]) + len(adjs) * (len(adjs) - 1))
             if len(adjs) <= 1:
                 return 0.0
             ligs = 0
@@ -280,6 +626,7 @@ class MetabolicNetwork (MyGraph):
             return float(ligs)/(len(adjs)*(len(adjs)-1))
 
 
+    @instrumented
     def all_clustering_coefs(self) -> dict:
         """
         Devolve o coeficiente de clustering de cada nodo do grafo
@@ -290,6 +637,7 @@ class MetabolicNetwork (MyGraph):
         return ccs
     
     
+    @instrumented
     def mean_clustering_coef(self) -> float:
         """
         Devolve a média dos coeficiente de clustering de cada nodo do grafo
@@ -298,6 +646,7 @@ class MetabolicNetwork (MyGraph):
         return sum(ccs.values()) / float(len(ccs))
 
 
+    @instrumented
     def mean_clustering_perdegree (self, deg_type:str = "inout"):
         """
         Devolve a média dos coeficientes de clustering de cada nodo associado a cada grau
@@ -319,6 +668,199 @@ class MetabolicNetwork (MyGraph):
         return ck
     
     
+    @instrumented
+    def all_betweenness(self, normalized:bool = True, processes:int = 1, k:int = None, seed:int = None) -> dict:
+        """
+        Devolve a centralidade de intermediação (betweenness) de cada nodo do grafo: soma, para todos
+        os pares de nodos, da fração dos caminhos mais curtos que passam pelo nodo (algoritmo de Brandes,
+        em O(V.E)). Identifica os nodos de estrangulamento da rede (p.e. reações por onde passa a
+        maioria dos caminhos entre metabolitos)
+        
+        Parameters
+        ----------
+        :param normalized: Se True, divide pelo número de pares de outros nodos, (n-1)(n-2)
+        :param processes: Número de processos pelos quais os nodos de origem são divididos (None usa o número de CPUs)
+        :param k: Se especificado, estima a centralidade a partir de uma amostra de k nodos de origem
+        (resultado escalado por n/k), para redes de grande dimensão
+        :param seed: Semente do gerador aleatório da amostra
+        """
+        csr = self.freeze()
+        n = len(csr.nodes)
+        sources = None
+        scale = 1.0
+        if k is not None:
+            if type(k) != int or k <= 0:
+                raise ValueError("O parâmetro 'k' deve ser um inteiro positivo")
+            if k < n:
+                sources = random.Random(seed).sample(range(n), k)
+                scale = n / k
+        if normalized and n > 2:
+            scale /= (n - 1) * (n - 2)
+        bc = csr.betweenness(sources, processes, probe = self._probe)
+        return {v: bc[i] * scale for i, v in enumerate(csr.nodes)}
+    
+    
+    ## centralidades (iteração de potência com NumPy)
+    
+    def _edge_arrays(self) -> tuple:
+        """
+        Devolve a lista de nodos e as arrays NumPy (origem, destino) dos arcos do grafo,
+        com os nodos convertidos nos seus índices na lista (memorizadas quando a cache está ativa)
+        """
+        if np is None:
+            raise ImportError("O cálculo das centralidades requer o NumPy")
+        def compute():
+            graph = self.graph
+            nodes = list(graph)
+            index = {v: i for i, v in enumerate(nodes)}
+            for v in self.rev_graph: #Destinos que não são chaves da lista de adjacência
+                if v not in index:
+                    index[v] = len(nodes)
+                    nodes.append(v)
+            counts = np.fromiter((len(graph[u]) for u in graph), dtype = np.int64, count = len(graph))
+            src = np.repeat(np.arange(len(counts), dtype = np.int64), counts)
+            dst = np.fromiter((index[t] for u in graph for t in graph[u]), dtype = np.int64, count = len(src))
+            return nodes, src, dst
+        if self._cache is None:
+            return compute()
+        return self._cached(("edge_arrays",), compute)
+    
+    
+    @staticmethod
+    def _start_vector(nodes:list, start:dict):
+        """
+        Devolve o vetor inicial da iteração de potência: uniforme ou, para retomar um cálculo
+        anterior, os valores do dicionário 'start' (nodos em falta começam com 0)
+        
+        Parameters
+        ----------
+        :param nodes: Lista de nodos
+        :param start: Dicionário {nodo: valor} (p.e. o resultado de uma chamada anterior) ou None
+        """
+        n = len(nodes)
+        if start is not None:
+            x = np.fromiter((start.get(v, 0) for v in nodes), dtype = np.float64, count = n)
+            if x.sum() > 0:
+                return x
+        return np.full(n, 1.0 / n)
+    
+    
+    def _power_iteration(self, step, x, tol:float, max_iter:int, edges:int = 0):
+        """
+        Aplica a função 'step' ao vetor até que a variação (norma L1) entre iterações consecutivas
+        seja inferior a n * tol. Lança RuntimeError se não convergir em max_iter iterações
+        
+        Parameters
+        ----------
+        :param step: Função que recebe o vetor atual e devolve o seguinte
+        :param x: Vetor inicial
+        :param tol: Tolerância por nodo
+        :param max_iter: Número máximo de iterações
+        :param edges: Número de arcos percorridos por cada iteração (registado na instrumentação)
+        """
+        probe = self._probe
+        for _ in range(max_iter):
+            new = step(x)
+            if probe is not None: probe.visit(len(x), edges)
+            if np.abs(new - x).sum() < len(x) * tol:
+                return new
+            x = new
+        raise RuntimeError(f"A iteração de potência não convergiu em {max_iter} iterações")
+    
+    
+    @instrumented
+    def pagerank(self, alpha:float = 0.85, tol:float = 1e-6, max_iter:int = 100, start:dict = None) -> dict:
+        """
+        Devolve o PageRank de cada nodo: probabilidade estacionária de um passeio aleatório que segue
+        um arco de saída com probabilidade alpha ou salta para um nodo ao acaso. Os nodos sem
+        sucessores distribuem o seu valor por todos os nodos
+        
+        Parameters
+        ----------
+        :param alpha: Fator de amortecimento
+        :param tol: Tolerância do critério de paragem
+        :param max_iter: Número máximo de iterações
+        :param start: Resultado anterior usado como vetor inicial (acelera o cálculo após pequenas alterações)
+        """
+        nodes, src, dst = self._edge_arrays()
+        n = len(nodes)
+        if n == 0:
+            return {}
+        out_deg = np.bincount(src, minlength = n).astype(np.float64)
+        dangling = out_deg == 0
+        inv_deg = np.divide(1.0, out_deg, out = np.zeros(n), where = ~dangling)
+        
+        def step(x):
+            y = alpha * np.bincount(dst, weights = (x * inv_deg)[src], minlength = n)
+            return y + (alpha * x[dangling].sum() + 1 - alpha) / n
+        
+        x = self._start_vector(nodes, start)
+        x = self._power_iteration(step, x / x.sum(), tol, max_iter, len(src))
+        return dict(zip(nodes, x.tolist()))
+    
+    
+    @instrumented
+    def eigenvector_centrality(self, tol:float = 1e-6, max_iter:int = 100, start:dict = None) -> dict:
+        """
+        Devolve a centralidade de vetor próprio de cada nodo (componente do vetor próprio dominante
+        da matriz de adjacência, com norma euclidiana 1): um nodo é central se os seus antecessores
+        forem centrais. A iteração usa A + I, com o mesmo vetor próprio, para convergir também
+        em grafos bipartidos (como as redes metabolito-reação)
+        
+        Parameters
+        ----------
+        :param tol: Tolerância do critério de paragem
+        :param max_iter: Número máximo de iterações
+        :param start: Resultado anterior usado como vetor inicial
+        """
+        nodes, src, dst = self._edge_arrays()
+        n = len(nodes)
+        if n == 0:
+            return {}
+        
+        def step(x):
+            y = x + np.bincount(dst, weights = x[src], minlength = n)
+            norm = np.linalg.norm(y)
+            return y / norm if norm > 0 else y
+        
+        x = self._start_vector(nodes, start)
+        x = self._power_iteration(step, x / np.linalg.norm(x), tol, max_iter, len(src))
+        return dict(zip(nodes, x.tolist()))
+    
+    
+    @instrumented
+    def katz_centrality(self, alpha:float = 0.1, beta:float = 1.0, tol:float = 1e-6, max_iter:int = 1000,
+                        start:dict = None, normalized:bool = True) -> dict:
+        """
+        Devolve a centralidade de Katz de cada nodo, x = alpha * A^T x + beta: soma dos caminhos que
+        terminam no nodo, com peso alpha^k para caminhos de comprimento k. Converge se alpha for
+        inferior ao inverso do maior valor próprio da matriz de adjacência
+        
+        Parameters
+        ----------
+        :param alpha: Fator de atenuação
+        :param beta: Centralidade base de cada nodo
+        :param tol: Tolerância do critério de paragem
+        :param max_iter: Número máximo de iterações
+        :param start: Resultado anterior usado como vetor inicial
+        :param normalized: Se True, o resultado é normalizado para norma euclidiana 1
+        """
+        nodes, src, dst = self._edge_arrays()
+        n = len(nodes)
+        if n == 0:
+            return {}
+        
+        def step(x):
+            return alpha * np.bincount(dst, weights = x[src], minlength = n) + beta
+        
+        x = self._start_vector(nodes, start) if start is not None else np.zeros(n)
+        x = self._power_iteration(step, x, tol, max_iter, len(src))
+        if normalized:
+            norm = np.linalg.norm(x)
+            if norm > 0:
+                x = x / norm
+        return dict(zip(nodes, x.tolist()))
+    
     
     def reacoes_ativas(self, all_subs:list):
         """
@@ -331,10 +873,10 @@ class MetabolicNetwork (MyGraph):
         if self.net_type != "metabolite-reaction":
             return []
 
+        all_subs = set(all_subs)
         active = []
         for r in self.node_types["reaction"]:
-            pred = self.get_predecessors(r)
-            if all([p in all_subs for p in pred]):
+            if all(p in all_subs for p in self.rev_graph.get(r, ())):
                 active.append(r)
         return active
     
@@ -357,29 +899,337 @@ class MetabolicNetwork (MyGraph):
         return list(set(result)) #Eliminar repetidos
     
     
-    def metabolitos_finais(self, met_iniciais:list):
+    def _expansion_index(self) -> tuple:
+        """
+        Devolve a representação da rede usada na expansão (ver _expand), com metabolitos e reações
+        convertidos em inteiros (memorizada quando a cache está ativa): tuplo (metabolitos, índice dos
+        metabolitos, reações, índice das reações, número de substratos de cada reação, reações que
+        consomem cada metabolito, produtos de cada reação)
+        """
+        def compute():
+            graph = self.graph
+            rev = self.rev_graph
+            reactions = [r for r in self.node_types["reaction"] if r in graph]
+            r_index = {r: i for i, r in enumerate(reactions)}
+            mets = [v for v in graph if v not in r_index]
+            m_index = {m: i for i, m in enumerate(mets)}
+            need = []
+            consumers = [[] for _ in mets]
+            products = []
+            for i, r in enumerate(reactions):
+                subs = [m_index[p] for p in rev[r] if p in m_index]
+                for m in subs:
+                    consumers[m].append(i)
+                need.append(len(subs))
+                products.append([m_index[p] for p in graph[r] if p in m_index])
+            return mets, m_index, reactions, r_index, need, consumers, products
+        if self._cache is None:
+            return compute()
+        return self._cached(("expansion",), compute)
+    
+    
+    @instrumented
+    def metabolitos_finais(self, met_iniciais:list, generation:bool = False):
         """
         Devolve uma lista de todos os metabolitos que podem ser produzidos
-        a partir de uma lista de metabolitos iniciais
+        a partir de uma lista de metabolitos iniciais, pela ordem em que são produzidos.
+        Cada reação guarda o número de substratos ainda em falta e é ativada quando este
+        chega a zero, pelo que a expansão completa é feita em O(V+E)
         
         Parameters
         ----------
         :param met_iniciais: Lista de metabolitos iniciais
+        :param generation: Se True, devolve um dicionário {metabolito: geração}, em que a geração
+        é o número de passos de ativação de reações necessários para produzir o metabolito
         """
         if len(met_iniciais) == 0 or self.net_type != "metabolite-reaction":
-            return []
+            return {} if generation else []
         
-        final = []
-        while True:
-            active_r = self.reacoes_ativas(met_iniciais)
-            met_prod = self.metabolitos_produzidos(active_r)
-            if (len(met_prod) != 0) and (not all([m in final for m in met_prod])):
-                for met in met_prod:
-                    if met not in final:
-                        final.append(met)
-                        met_iniciais = list(set(met_iniciais + final)) #Juntar novos metabolitos aos iniciais
-            else:
-                break
-        return final
+        index = self._expansion_index()
+        mets, m_index = index[0], index[1]
+        work = [0, 0] if self._probe is not None else None
+        produced = _expand(index, [m_index[m] for m in set(met_iniciais) if m in m_index], work = work)
+        if work is not None:
+            self._probe.visit(*work)
+        if generation:
+            return {mets[m]: g for m, g in produced}
+        return [mets[m] for m, _ in produced]
+    
+    
+    @instrumented
+    def scope_matrix(self, seed_sets:list, knockouts:list = None, processes:int = 1, chunksize:int = None) -> tuple:
+        """
+        Calcula a expansão da rede (ver metabolitos_finais) para vários cenários, combinando cada conjunto
+        de metabolitos iniciais com cada conjunto de reações inativadas (knockouts). A representação da rede
+        é calculada uma única vez e os cenários podem ser divididos por um conjunto de processos.
+        Devolve um tuplo (matriz, metabolitos): matriz booleana NumPy (cenários x metabolitos) em que a
+        posição [i, j] indica se o metabolito j é produzido no cenário i, sendo os cenários ordenados por
+        conjunto de metabolitos iniciais e, dentro de cada um, por conjunto de knockouts
+        
+        Parameters
+        ----------
+        :param seed_sets: Lista de conjuntos (listas) de metabolitos iniciais
+        :param knockouts: Lista de conjuntos (listas) de reações inativadas (None para nenhum knockout)
+        :param processes: Número de processos (None usa o número de CPUs; 1 calcula no processo atual)
+        :param chunksize: Número de cenários por tarefa
+        """
+        if np is None:
+            raise ImportError("As análises em lote requerem o NumPy")
+        if self.net_type != "metabolite-reaction":
+            raise ValueError("As análises de expansão requerem uma rede do tipo 'metabolite-reaction'")
+        index = self._expansion_index()
+        mets, m_index, r_index = index[0], index[1], index[3]
+        if knockouts is None:
+            knockouts = [[]]
+        blocked_sets = []
+        for ko in knockouts:
+            unknown = [r for r in ko if r not in r_index]
+            if unknown:
+                raise ValueError(f"Reações desconhecidas: {unknown}")
+            blocked_sets.append([r_index[r] for r in ko])
+        tasks = []
+        for seeds in seed_sets:
+            #Sem metabolitos iniciais não há expansão (como em metabolitos_finais)
+            seed_ids = [m_index[m] for m in set(seeds) if m in m_index] if len(seeds) > 0 else None
+            for blocked in blocked_sets:
+                tasks.append((seed_ids, blocked))
+        
+        if processes is None:
+            processes = os.cpu_count() or 1
+        work = [0, 0] if self._probe is not None else None
+        if processes == 1 or len(tasks) < 2:
+            rows = _expand_rows(index, tasks, work)
+        else:
+            if chunksize is None:
+                chunksize = max(1, len(tasks) // (processes * 4))
+            chunks = [tasks[i:i + chunksize] for i in range(0, len(tasks), chunksize)]
+            with ProcessPoolExecutor(max_workers = processes, initializer = _init_expansion_worker,
+                                     initargs = (index,)) as ex:
+                parts = list(ex.map(_worker_expand_rows, chunks, [work is not None] * len(chunks)))
+            rows = b"".join(part for part, _ in parts)
+            if work is not None:
+                for _, (nv, ne) in parts:
+                    work[0] += nv
+                    work[1] += ne
+        if work is not None:
+            self._probe.visit(*work)
+        matrix = np.frombuffer(rows, dtype = np.bool_).reshape(len(tasks), len(mets)).copy()
+        return matrix, list(mets)
+    
+    
+    def knockout_scan(self, met_iniciais:list, processes:int = 1) -> tuple:
+        """
+        Calcula a expansão da rede a partir dos metabolitos iniciais para cada knockout de uma única reação.
+        Devolve um tuplo (matriz, reações, metabolitos), em que a linha i da matriz booleana indica os
+        metabolitos produzidos quando a reação i é inativada (ver scope_matrix)
+        
+        Parameters
+        ----------
+        :param met_iniciais: Lista de metabolitos iniciais
+        :param processes: Número de processos (None usa o número de CPUs; 1 calcula no processo atual)
+        """
+        reactions = list(self._expansion_index()[2]) if self.net_type == "metabolite-reaction" else []
+        matrix, mets = self.scope_matrix([met_iniciais], [[r] for r in reactions], processes)
+        return matrix, reactions, mets
+
+
+def _expand(index:tuple, seeds:list, blocked = (), work:list = None) -> list:
+    """
+    Expansão da rede a partir de um conjunto de metabolitos iniciais: cada reação é ativada quando
+    todos os seus substratos estão disponíveis, tornando disponíveis os seus produtos. Os metabolitos
+    são processados por gerações (os iniciais têm geração 0) e os produzidos pelas reações ativadas
+    pelos metabolitos da geração g têm geração g+1. Devolve a lista de tuplos (metabolito, geração)
+    dos metabolitos produzidos, pela ordem em que são produzidos (inclui os metabolitos iniciais que
+    também são produzidos por alguma reação)
+
+    Parameters
+    ----------
+    :param index: Representação da rede devolvida por MetabolicNetwork._expansion_index
+    :param seeds: Identificadores inteiros dos metabolitos iniciais
+    :param blocked: Identificadores inteiros das reações inativadas (p.e. knockouts)
+    :param work: Lista [nodos visitados, arcos percorridos] incrementada com o trabalho da expansão
+    (instrumentação; None para não contar)
+    """
+    _, _, reactions, _, need, consumers, products = index
+    missing = list(need)
+    for r in blocked:
+        missing[r] = -1 #Nunca chega a zero
+    available = bytearray(len(consumers))
+    made = bytearray(len(consumers))
+    produced = []
+    level = []
+    for m in seeds:
+        if not available[m]:
+            available[m] = 1
+            level.append(m)
+    fired = [r for r in range(len(reactions)) if missing[r] == 0] #Reações sem substratos
+    gen = 0
+    while level or fired:
+        for m in level:
+            for r in consumers[m]:
+                missing[r] -= 1
+                if missing[r] == 0:
+                    fired.append(r)
+        gen += 1
+        level = []
+        for r in fired:
+            for p in products[r]:
+                if not made[p]:
+                    made[p] = 1
+                    produced.append((p, gen))
+                    if not available[p]:
+                        available[p] = 1
+                        level.append(p)
+        fired = []
+    if work is not None: #Metabolitos disponíveis e reações ativadas, com os respetivos arcos percorridos
+        fired = [r for r in range(len(reactions)) if missing[r] == 0]
+        work[0] += sum(available) + len(fired)
+        work[1] += sum(len(consumers[m]) for m in range(len(consumers)) if available[m])
+        work[1] += sum(len(products[r]) for r in fired)
+    return produced
+
+
+def _expand_rows(index:tuple, tasks:list, work:list = None) -> bytes:
+    """
+    Calcula a expansão da rede para uma lista de cenários e devolve as linhas da matriz de resultados
+    concatenadas (um byte por metabolito, 1 se o metabolito é produzido)
+
+    Parameters
+    ----------
+    :param index: Representação da rede devolvida por MetabolicNetwork._expansion_index
+    :param tasks: Lista de cenários (metabolitos iniciais, reações inativadas), com identificadores inteiros
+    (metabolitos iniciais None se o conjunto estiver vazio)
+    :param work: Lista [nodos visitados, arcos percorridos] incrementada pelas expansões (ver _expand)
+    """
+    n = len(index[0])
+    rows = bytearray()
+    for seeds, blocked in tasks:
+        row = bytearray(n)
+        if seeds is not None:
+            for m, _ in _expand(index, seeds, blocked, work):
+                row[m] = 1
+        rows += row
+    return bytes(rows)
+
+
+def _project(graph:dict, sources:list, skip_middle = (), skip_nodes = ()) -> dict:
+    """
+    Projeção de um grafo bipartido: devolve a lista de adjacência com um arco v -> t para cada caminho
+    v -> nodo intermédio -> t (v diferente de t) a partir dos nodos de origem, pela mesma ordem em que
+    seriam encontrados percorrendo os sucessores dos sucessores de cada nodo. Com o NumPy, os pares são
+    gerados por operações vetoriais (produto das matrizes de incidência, como listas de índices) e as
+    repetições eliminadas com np.unique; sem o NumPy, os caminhos são percorridos em Python
+
+    Parameters
+    ----------
+    :param graph: Lista de adjacência do grafo bipartido
+    :param sources: Nodos de origem (e de destino) da projeção
+    :param skip_middle: Nodos intermédios ignorados
+    :param skip_nodes: Nodos de origem/destino ignorados (mantidos na projeção como nodos isolados)
+    """
+    adj = {}
+    if np is None:
+        for v in sources:
+            row = adj.setdefault(v, {})
+            if v in skip_nodes:
+                continue
+            for mid in graph[v]:
+                if mid in skip_middle:
+                    continue
+                for t in graph[mid]:
+                    if t != v and t not in skip_nodes:
+                        if t not in adj: adj[t] = {}
+                        row[t] = None
+        return adj
+
+    nodes = list(graph)
+    index = {v: i for i, v in enumerate(nodes)}
+    n = len(nodes)
+    counts = np.fromiter((len(graph[v]) for v in nodes), dtype = np.int64, count = n)
+    offsets = np.zeros(n + 1, dtype = np.int64)
+    np.cumsum(counts, out = offsets[1:])
+    targets = np.fromiter((index[t] for v in nodes for t in graph[v]), dtype = np.int64, count = int(offsets[-1]))
+    excluded = np.zeros(n, dtype = np.bool_)
+    for v in set(skip_middle) | set(skip_nodes):
+        if v in index: excluded[index[v]] = True
+
+    def gather(owners):
+        #Sucessores de cada nodo de 'owners' (pela ordem da lista de adjacência), com o índice do respetivo nodo
+        lens = counts[owners]
+        pos = np.repeat(offsets[owners] - np.cumsum(lens) + lens, lens) + np.arange(lens.sum())
+        return np.repeat(np.arange(len(owners)), lens), targets[pos]
+
+    src = np.fromiter((index[v] for v in sources), dtype = np.int64, count = len(sources))
+    src = src[~excluded[src]]
+    owner, mid = gather(src)
+    keep = ~excluded[mid]
+    owner, mid = owner[keep], mid[keep]
+    second, dst = gather(mid)
+    pair_src = src[owner[second]]
+    keep = (dst != pair_src) & ~excluded[dst]
+    pair_src, dst = pair_src[keep], dst[keep]
+    #Elimina pares repetidos, mantendo a ordem da primeira ocorrência
+    _, first = np.unique(pair_src * n + dst, return_index = True)
+    first.sort()
+    pair_src, dst = pair_src[first].tolist(), dst[first].tolist()
+
+    k = 0
+    total = len(pair_src)
+    for v in sources:
+        row = adj.setdefault(v, {})
+        i = index[v]
+        while k < total and pair_src[k] == i:
+            t = nodes[dst[k]]
+            if t not in adj: adj[t] = {}
+            row[t] = None
+            k += 1
+    return adj
+
+
+_COEFFICIENT = re.compile(r"^(\d+(?:\.\d+)?)\s+(\S.*)$")
+
+def _parse_species(token:str) -> tuple:
+    """
+    Separa o coeficiente estequiométrico do nome de um metabolito ("2 M_h_c" -> ("M_h_c", 2)).
+    Sem coeficiente explícito, o coeficiente é 1
 
- 
\ No newline at end of file
+    Parameters
+    ----------
+    :param token: Texto de um metabolito numa reação
+    """
+    token = token.strip()
+    match = _COEFFICIENT.match(token)
+    if match is None:
+        return token, 1
+    coef = match.group(1)
+    return match.group(2).strip(), (float(coef) if "." in coef else int(coef))
+
+
+## funções executadas nos processos auxiliares (têm de estar ao nível do módulo)
+
+_worker_index = None
+
+def _init_expansion_worker(index:tuple):
+    """
+    Guarda a representação da rede no processo auxiliar (é enviada uma única vez, na criação do processo)
+
+    Parameters
+    ----------
+    :param index: Representação da rede devolvida por MetabolicNetwork._expansion_index
+    """
+    global _worker_index
+    _worker_index = index
+
+
+def _worker_expand_rows(tasks:list, count:bool = False) -> tuple:
+    """
+    Calcula a expansão da rede para um bloco de cenários no processo auxiliar. Devolve um tuplo
+    (linhas da matriz de resultados, [nodos visitados, arcos percorridos] ou None)
+
+    Parameters
+    ----------
+    :param tasks: Lista de cenários (ver _expand_rows)
+    :param count: Se True, conta os nodos visitados e os arcos percorridos (instrumentação)
+    """
+    work = [0, 0] if count else None
+    return _expand_rows(_worker_index, tasks, work), work
@@ -4,24 +4,169 @@
 Class: MyGraph
 """
 
-import math
+import copy
+import functools
+import heapq
+import time
+import warnings
+from collections import OrderedDict, deque, namedtuple
+from contextlib import contextmanager
+from itertools import islice
 from typing import Union
 
+
+class GraphPath(namedtuple("GraphPath", ["nodes", "dist"])):
+    """
+    Caminho entre dois nodos do grafo: lista de nodos percorridos e distância total
+    """
+    __slots__ = ()
+    
+    def __str__(self):
+        return " -> ".join(str(n) for n in self.nodes) + f" (dist = {self.dist})"
+
+
+class PathTree:
+    """
+    Árvore de caminhos mais curtos a partir de um nodo de origem
+    """
+    
+    def __init__(self, origin, dist:dict, prev:dict):
+        """
+        Guarda as distâncias e os antecessores de cada nodo atingível
+        
+        Parameters
+        ----------
+        :param origin: Nodo de origem
+        :param dist: Dicionário {nodo: distância à origem}
+        :param prev: Dicionário {nodo: nodo anterior no caminho} (None para a origem)
+        """
+        self.origin = origin
+        self.dist = dist
+        self.prev = prev
+    
+    def reaches(self, d) -> bool:
+        """
+        Verifica se o nodo especificado é atingível a partir da origem
+        
+        Parameters
+        ----------
+        :param d: Nodo de destino
+        """
+        return d in self.dist
+    
+    def distance(self, d) -> Union[int,float,None]:
+        """
+        Devolve a distância da origem ao nodo especificado (None caso não seja atingível)
+        
+        Parameters
+        ----------
+        :param d: Nodo de destino
+        """
+        return self.dist.get(d)
+    
+    def path(self, d) -> Union[GraphPath,None]:
+        """
+        Reconstrói o caminho mais curto da origem ao nodo especificado (None caso não seja atingível)
+        
+        Parameters
+        ----------
+        :param d: Nodo de destino
+        """
+        if d not in self.dist:
+            return None
+        nodes = [d]
+        node = d
+        while node != self.origin:
+            node = self.prev[node]
+            nodes.append(node)
+        nodes.reverse()
+        return GraphPath(nodes, self.dist[d])
+
+
+class GraphProbe:
+    """
+    Recolhe, por método, o número de chamadas, nodos visitados, arcos percorridos e tempo de execução
+    """
+    
+    def __init__(self):
+        self.report = {} #{método: {"calls", "nodes", "edges", "time"}}
+        self.active = [] #Registos dos métodos instrumentados em execução (o último é o mais interno)
+    
+    def call(self, name:str, method, g, args:tuple, kwargs:dict):
+        """
+        Executa um método instrumentado, registando a chamada e o tempo de execução (inclusivo).
+        Uma chamada recursiva do mesmo método já é contabilizada pela chamada exterior
+        
+        Parameters
+        ----------
+        :param name: Nome do método
+        :param method: Função a executar
+        :param g: Grafo sobre o qual o método é executado
+        :param args: Argumentos posicionais
+        :param kwargs: Argumentos nomeados
+        """
+        rec = self.report.get(name)
+        if rec is None:
+            rec = self.report[name] = {"calls": 0, "nodes": 0, "edges": 0, "time": 0.0}
+        rec["calls"] += 1
+        if any(r is rec for r in self.active):
+            return method(g, *args, **kwargs)
+        self.active.append(rec)
+        start = time.perf_counter()
+        try:
+            return method(g, *args, **kwargs)
+        finally:
+            rec["time"] += time.perf_counter() - start
+            self.active.pop()
+    
+    def visit(self, nodes:int = 1, edges:int = 0):
+        """
+        Regista nodos visitados e arcos percorridos em todos os métodos instrumentados em execução
+        (valores inclusivos, como o tempo: p.e. mean_distances inclui o trabalho de all_pairs_stats)
+        
+        Parameters
+        ----------
+        :param nodes: Número de nodos visitados
+        :param edges: Número de arcos percorridos
+        """
+        for rec in self.active:
+            rec["nodes"] += nodes
+            rec["edges"] += edges
+
+
+def instrumented(method):
+    """
+    Decorador dos métodos de consulta dos grafos: quando a instrumentação está ativa (ver MyGraph.instrument),
+    regista as chamadas ao método; caso contrário, chama diretamente o método
+    """
+    name = method.__name__
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        probe = self._probe
+        if probe is None:
+            return method(self, *args, **kwargs)
+        return probe.call(name, method, self, args, kwargs)
+    return wrapper
+
+
 class MyGraph:
     
     """
     Classe que cria um grafo e efetua análises ao mesmo
     """
     
-    def __init__(self, g:dict = {}, w = False):
+    def __init__(self, g:dict = None, w = False):
         """
         Guarda os parâmetros importantes para a criação de grafos, definindo também o seu tipo
         
         Parameters
         ----------
-        :param g: Dicionário que representa o grafo
+        :param g: Dicionário que representa o grafo (por defeito, um grafo vazio novo em cada instância)
         :param w: Booleano que indica se grafo tem pesos (True) ou não (False)
         """
+        if g is None: #Um dicionário por defeito partilhado deixaria os índices de antecessores dessincronizados
+            g = {}
         if type(g) !=dict:
             raise TypeError("O grafo deve ser do tipo dicionário")
         if type(w) != bool:
@@ -30,8 +175,118 @@ class MyGraph:
         self.graph = g
         #self.orig_graph = g #Guarda grafo original, caso sejam efetuadas alterações
         self.weighted = w #Define se grafo tem pesos ou não
+        self.version = 0 #Contador de versões, incrementado por cada alteração ao grafo
+        self._cache = None #Cache de resultados de consultas (desativada por defeito)
+        self._reach_index = None #Índice de atingibilidade (construído a pedido)
+        self.read_only = False #Vistas sobre outros grafos não podem ser alteradas
+        self._probe = None #Instrumentação (desativada por defeito)
+        self._build_predecessors()
         self._check_weights()
         
+    @classmethod
+    def from_edges(cls, edges, weighted:bool = False, batch_size:int = 10000, **kwargs) -> "MyGraph":
+        """
+        Cria um grafo a partir de um iterável de arcos (origem, destino) ou (origem, destino, peso),
+        numa única passagem e sem chamar add_edge para cada arco. Os arcos são consumidos em lotes,
+        sendo a validação feita por lote. Arcos repetidos mantêm o último peso
+        
+        Parameters
+        ----------
+        :param edges: Iterável (p.e. lista ou gerador) de tuplos que representam os arcos
+        :param weighted: Booleano que indica se grafo tem pesos (True) ou não (False)
+        :param batch_size: Número de arcos processados por lote
+        :param kwargs: Argumentos do construtor das subclasses (p.e. network_type de MetabolicNetwork)
+        """
+        if type(weighted) != bool:
+            raise TypeError("O weight deve ser do tipo boolean")
+        graph = {}
+        rev = {}
+        it = iter(edges)
+        while True:
+            batch = list(islice(it, batch_size))
+            if not batch:
+                break
+            #Validação do lote completo antes de o inserir
+            if not all(2 <= len(e) <= 3 for e in batch):
+                raise ValueError("Cada arco deve ser um tuplo (origem, destino) ou (origem, destino, peso)")
+            if weighted and not all(len(e) == 2 or type(e[2]) in [int,float] or e[2] is None for e in batch):
+                raise TypeError("Os pesos dos arcos devem ser NoneType ou valores numéricos")
+            for e in batch:
+                o, d = e[0], e[1]
+                if o not in graph:
+                    graph[o] = {}
+                    rev[o] = {}
+                if d not in graph:
+                    graph[d] = {}
+                    rev[d] = {}
+                if weighted:
+                    w = e[2] if len(e) == 3 and e[2] is not None else 0
+                else:
+                    w = None
+                graph[o][d] = w
+                rev[d][o] = w
+        g = cls(**kwargs)
+        g.weighted = weighted
+        g.graph = graph
+        g.rev_graph = rev
+        g.version += 1
+        return g
+    
+    
+    @classmethod
+    def from_edge_file(cls, filename:str, weighted:bool = False, sep:str = None, batch_size:int = 10000,
+                       **kwargs) -> "MyGraph":
+        """
+        Cria um grafo a partir de um ficheiro com um arco por linha ("origem destino [peso]"),
+        lido em streaming. Linhas vazias ou começadas por '#' são ignoradas
+        
+        Parameters
+        ----------
+        :param filename: Nome do ficheiro
+        :param weighted: Booleano que indica se grafo tem pesos (True) ou não (False)
+        :param sep: Separador entre os campos de cada linha (por defeito, espaços em branco)
+        :param batch_size: Número de arcos processados por lote
+        :param kwargs: Argumentos do construtor das subclasses (ver from_edges)
+        """
+        def parse_weight(x:str) -> Union[int,float]:
+            try:
+                return int(x)
+            except ValueError:
+                return float(x)
+        
+        def read_edges(rf):
+            for num, line in enumerate(rf, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                tokens = [t.strip() for t in line.split(sep)]
+                if len(tokens) == 2:
+                    yield tokens[0], tokens[1]
+                elif len(tokens) == 3:
+                    try:
+                        yield tokens[0], tokens[1], parse_weight(tokens[2]) if weighted else None
+                    except ValueError:
+                        raise ValueError(f"Peso inválido na linha {num}: {line}")
+                else:
+                    raise ValueError(f"Linha inválida ({num}): {line}")
+        
+        with open(filename) as rf:
+            return cls.from_edges(read_edges(rf), weighted, batch_size, **kwargs)
+    
+    
+    def _build_predecessors(self):
+        """
+        Constrói o índice de antecessores (grafo reverso) a partir da lista de adjacência.
+        Deve ser chamado sempre que 'self.graph' é substituído diretamente
+        """
+        rev = {v: {} for v in self.graph}
+        for n1 in self.graph:
+            for n2, w in self.graph[n1].items():
+                if n2 not in rev: rev[n2] = {}
+                rev[n2][n1] = w
+        self.rev_graph = rev #rev_graph[destino][origem] = peso
+        self.version += 1
+    
     def _check_weights(self):
         """
         Define todos os pesos como None no caso do grafo ser definido como não tendo pesos,
@@ -60,6 +315,14 @@ class MyGraph:
             return False
         
     
+    def _check_writable(self):
+        """
+        Impede alterações a vistas (subgraph_view, reversed_view), que partilham os dados do grafo original
+        """
+        if self.read_only:
+            raise TypeError("As vistas de grafos são apenas de leitura")
+        
+    
     def change_type(self, w:bool):
         """
         Altera o tipo do grafo (define se tem pesos ou não)
@@ -68,19 +331,26 @@ class MyGraph:
         ----------
         :param w: Booleano que indica se grafo tem pesos (True) ou não (False)
         """
+        self._check_writable()
 
         if w==True:
             for n1 in self.graph:
                 for n2 in self.graph[n1]:
                     if not type(self.graph[n1][n2]) in [int,float]:
                         self.graph[n1][n2] = 0 #Altera todos os valores não-numéricos para 0
+                        self.rev_graph[n2][n1] = 0
             self.weighted = True
+            self.version += 1
+            if self._reach_index is not None: self._reach_index.touch()
                         
         else:
             for n1 in self.graph:
                 for n2 in self.graph[n1]:
                     self.graph[n1][n2] = None #Altera todos os valores dos pesos para None
+                    self.rev_graph[n2][n1] = None
             self.weighted = False
+            self.version += 1
+            if self._reach_index is not None: self._reach_index.touch()
             
     
     def change_weights(self, node1:str, node2:str, value: Union[int,float,None]) -> bool:
@@ -93,9 +363,13 @@ class MyGraph:
         :param node2: Um nodo da ligação
         :param value: Valor do peso entre os nodos especificado
         """
+        self._check_writable()
 
         if (node1 in self.graph) and (node2 in self.graph) and (node2 in self.graph[node1]):
             self.graph[node1][node2] = value
+            self.rev_graph[node2][node1] = value
+            self.version += 1
+            if self._reach_index is not None: self._reach_index.touch()
             return True
         elif not self._check_valid(node1):
             print("'node1' does not exist in the graph")
@@ -108,6 +382,133 @@ class MyGraph:
             return False
                 
 
+    ## instrumentation
+    
+    @contextmanager
+    def instrument(self):
+        """
+        Gestor de contexto que ativa a instrumentação das consultas ao grafo e devolve o relatório,
+        um dicionário {método: {"calls", "nodes", "edges", "time"}} preenchido durante o bloco
+        (nodos visitados, arcos percorridos e tempo total em segundos, incluindo os dos métodos chamados). Exemplo:
+            with g.instrument() as report:
+                g.distance(o, d)
+        """
+        probe = GraphProbe()
+        previous = self._probe
+        self._probe = probe
+        try:
+            yield probe.report
+        finally:
+            self._probe = previous
+    
+    
+    ## reachability index
+    
+    def reachability_index(self):
+        """
+        Devolve o índice de atingibilidade do grafo (ReachabilityIndex), que responde a
+        reaches(u, v) em O(1) e a reachable_set(u) sem percorrer o grafo. O índice é construído
+        na primeira chamada e atualizado de forma incremental quando são adicionados nodos ou arcos
+        """
+        if self.read_only:
+            raise TypeError("O índice de atingibilidade não está disponível em vistas (não acompanham a versão do grafo original)")
+        if self._reach_index is None:
+            from ReachabilityIndex import ReachabilityIndex #Importação local para evitar dependência circular
+            self._reach_index = ReachabilityIndex(self)
+        return self._reach_index
+    
+    
+    ## query cache
+    
+    def enable_cache(self, maxsize:int = 128):
+        """
+        Ativa a memorização dos resultados das consultas (distance, shortest_path, dijkstra,
+        reachable_*), com remoção LRU. As consultas a partir de uma mesma origem são guardadas
+        como árvores completas, pelo que consultas seguintes a partir dessa origem custam
+        O(comprimento do caminho). Os resultados são invalidados sempre que a versão do grafo muda
+        
+        Parameters
+        ----------
+        :param maxsize: Número máximo de entradas guardadas
+        """
+        if type(maxsize) != int or maxsize <= 0:
+            raise ValueError("O parâmetro 'maxsize' deve ser um inteiro positivo")
+        if self.read_only:
+            raise TypeError("A cache não está disponível em vistas (não acompanham a versão do grafo original)")
+        self._cache = OrderedDict()
+        self._cache_maxsize = maxsize
+        self._cache_version = self.version
+        self._cache_hits = 0
+        self._cache_misses = 0
+    
+    
+    def disable_cache(self):
+        """
+        Desativa a memorização dos resultados das consultas e liberta as entradas guardadas
+        """
+        self._cache = None
+    
+    
+    def cache_info(self) -> Union[dict,None]:
+        """
+        Devolve um dicionário com as estatísticas da cache (acertos, falhas, tamanho, tamanho máximo
+        e versão do grafo a que as entradas dizem respeito), ou None se a cache estiver desativada
+        """
+        if self._cache is None:
+            return None
+        return {"hits": self._cache_hits, "misses": self._cache_misses, "size": len(self._cache),
+                "maxsize": self._cache_maxsize, "version": self._cache_version}
+    
+    
+    def _cached(self, key:tuple, compute):
+        """
+        Devolve o resultado guardado para a consulta 'key' na versão atual do grafo ou,
+        caso não exista, calcula-o com 'compute()' e guarda-o
+        
+        Parameters
+        ----------
+        :param key: Chave que identifica a consulta
+        :param compute: Função sem argumentos que calcula o resultado
+        """
+        cache = self._cache
+        if self._cache_version != self.version: #O grafo foi alterado: entradas antigas inválidas
+            cache.clear()
+            self._cache_version = self.version
+        if key in cache:
+            self._cache_hits += 1
+            cache.move_to_end(key)
+            return cache[key]
+        self._cache_misses += 1
+        res = compute()
+        cache[key] = res
+        if len(cache) > self._cache_maxsize:
+            cache.popitem(last = False)
+        return res
+    
+    
+    def _bfs_tree(self, o:str) -> PathTree:
+        """
+        Devolve a árvore BFS a partir de um nodo de origem (válido), com as distâncias acumuladas
+        ao longo da árvore (memorizada quando a cache está ativa)
+        
+        Parameters
+        ----------
+        :param o: Nodo de origem
+        """
+        def compute():
+            graph = self.graph
+            weighted = self.weighted
+            dist = {o: 0}
+            prev = {o: None}
+            for parent, node in self._bfs_edges(o):
+                dist[node] = dist[parent] + (graph[parent][node] if weighted else 1)
+                prev[node] = parent
+            return PathTree(o, dist, prev)
+        if self._cache is None:
+            return compute()
+        return self._cached(("bfs", o), compute)
+    
+
     def print_graph(self):
         """
         Imprime o grafo na forma de uma lista de adjacência
@@ -149,6 +550,133 @@ class MyGraph:
         return len(self.get_nodes()), len(self.get_edges())
       
         
+    def freeze(self):
+        """
+        Devolve uma cópia imutável e compacta do grafo em formato CSR (CSRGraph),
+        com os nodos convertidos em inteiros e os arcos guardados em arrays
+        """
+        from CSRGraph import CSRGraph #Importação local para evitar dependência circular
+        return CSRGraph.from_graph(self)
+    
+    to_csr = freeze
+    
+    
+    ## snapshots
+    
+    def save(self, filename:str):
+        """
+        Guarda o grafo num snapshot binário compacto (tabela de nodos e arrays CSR),
+        que pode ser lido rapidamente com load(). Os nodos devem ser str, int ou float
+        (a tabela de nodos é guardada em JSON); outros tipos lançam TypeError
+        
+        Parameters
+        ----------
+        :param filename: Nome do ficheiro
+        """
+        self.freeze().save(filename, self._snapshot_meta())
+    
+    
+    def _snapshot_meta(self) -> dict:
+        """
+        Devolve os metadados guardados no snapshot, além das arrays do grafo
+        """
+        return {"class": type(self).__name__}
+    
+    
+    @classmethod
+    def load(cls, filename:str, frozen:bool = False, use_mmap:bool = True):
+        """
+        Lê um grafo guardado com save(). Com frozen=True devolve diretamente o grafo CSR
+        (imutável), com as arrays mapeadas em memória, o que evita qualquer reconstrução: é o único
+        modo com leitura em tempo constante, e os metadados da classe original (p.e. o tipo de rede
+        e os tipos de nodos de MetabolicNetwork) ficam no atributo 'meta' do CSRGraph.
+        Por defeito, é reconstruído o grafo mutável (da classe que chama load), em O(V+E)
+        
+        Parameters
+        ----------
+        :param filename: Nome do ficheiro
+        :param frozen: Se True, devolve um CSRGraph em vez de um grafo mutável
+        :param use_mmap: Se True, mapeia as arrays do ficheiro em memória
+        """
+        from CSRGraph import CSRGraph #Importação local para evitar dependência circular
+        csr, meta = CSRGraph.load(filename, use_mmap)
+        if frozen:
+            return csr
+        return cls._from_snapshot(csr, meta)
+    
+    
+    @classmethod
+    def _from_snapshot(cls, csr, meta:dict) -> "MyGraph":
+        """
+        Reconstrói o grafo a partir das arrays CSR e dos metadados de um snapshot
+        
+        Parameters
+        ----------
+        :param csr: Grafo em formato CSR
+        :param meta: Metadados do snapshot
+        """
+        return cls(csr.to_adjacency(), csr.weighted)
+    
+    
+    ## views
+    
+    def _make_view(self, graph, rev_graph) -> "MyGraph":
+        """
+        Cria uma vista apenas de leitura do grafo com as listas de adjacência especificadas
+        (cópia superficial do objeto: os dicionários do grafo não são copiados)
+        
+        Parameters
+        ----------
+        :param graph: Lista de adjacência da vista
+        :param rev_graph: Índice de antecessores da vista
+        """
+        view = copy.copy(self)
+        view.graph = graph
+        view.rev_graph = rev_graph
+        view._cache = None
+        view._reach_index = None
+        view.read_only = True
+        return view
+    
+    
+    def subgraph_view(self, nodes) -> "MyGraph":
+        """
+        Devolve uma vista do subgrafo induzido pelos nodos especificados, sem copiar o grafo:
+        os nodos e arcos são filtrados quando acedidos. A vista é do mesmo tipo que o grafo e
+        aceita todos os métodos de consulta (procuras, graus, distâncias, ...), mas não pode ser alterada
+        
+        Parameters
+        ----------
+        :param nodes: Iterável com os nodos do subgrafo
+        """
+        from GraphView import SubgraphAdjacency #Importação local para evitar dependência circular
+        nodes = list(nodes)
+        return self._make_view(SubgraphAdjacency(self.graph, nodes), SubgraphAdjacency(self.rev_graph, nodes))
+    
+    
+    def reversed_view(self) -> "MyGraph":
+        """
+        Devolve uma vista do grafo com todos os arcos invertidos, sem copiar o grafo
+        (a lista de adjacência e o índice de antecessores trocam de papel)
+        """
+        return self._make_view(self.rev_graph, self.graph)
+    
+    
+    @instrumented
+    def all_pairs_stats(self, processes:int = None, chunksize:int = None) -> dict:
+        """
+        Devolve um dicionário com a distância média entre todos os pares de nodos atingíveis,
+        a fração de pares atingíveis e o histograma das distâncias, calculados sobre a
+        representação CSR e distribuídos por um conjunto de processos (ver CSRGraph.all_pairs_stats)
+        
+        Parameters
+        ----------
+        :param processes: Número de processos (None usa o número de CPUs; 1 calcula no processo atual)
+        :param chunksize: Número de nodos de origem por tarefa
+        """
+        return self.freeze().all_pairs_stats(processes, chunksize, self._probe)
+      
+        
     ## add nodes and edges    
     
     def add_vertex(self, v:str):
@@ -159,8 +687,12 @@ class MyGraph:
         ----------
         :param v: Nodo a adicionar ao grafo
         """
+        self._check_writable()
         if v not in self.graph:
             self.graph[v] = {}
+            self.rev_graph[v] = {}
+            self.version += 1
+            if self._reach_index is not None: self._reach_index.add_vertex(v)
         
         
     def add_edge(self, o:str, d:str, w: Union[int,float,None] = None):
@@ -174,6 +706,7 @@ class MyGraph:
         :param w: Peso associado ao arco
         """
         assert w==None or type(w) in [int,float], "Parâmetro 'w' deve ser NoneType ou um valor numérico"
+        self._check_writable()
         
         self.add_vertex(o)
         self.add_vertex(d)
@@ -184,6 +717,9 @@ class MyGraph:
             #Caso grafo não tenha pesos, o valor de 'w' é convertido para 'None'
             val = None if self.weighted==False else w
         self.graph[o][d] = val
+        self.rev_graph[d][o] = val
+        self.version += 1
+        if self._reach_index is not None: self._reach_index.add_edge(o, d)
 
 
 
@@ -206,16 +742,16 @@ class MyGraph:
     def get_predecessors(self, v:str) -> list:
         """
         Devolve lista dos antecessores do nodo especificado
+        (consultado no índice de antecessores, em O(grau de entrada))
         
         Parameters
         ----------
         :param v: Nodo do grafo
         """
-        res = []
-        for k in self.graph:
-            if v in self.graph[k]:
-                res.append(k)
-        return res
+        if not self._check_valid(v):
+            return []
+        else:
+            return list(self.rev_graph[v])
     
     
     def get_adjacents(self, v:str) -> list:
@@ -226,7 +762,9 @@ class MyGraph:
         ----------
         :param v: Nodo do grafo
         """
-        return list(set( self.get_successors(v) + self.get_predecessors(v) ))
+        if not self._check_valid(v):
+            return []
+        return list(self.graph[v].keys() | self.rev_graph[v].keys())
         
     
     ## degrees    
@@ -250,7 +788,9 @@ class MyGraph:
         ----------
         :param v: Nodo do grafo
         """
-        return len(self.get_predecessors(v))
+        if not self._check_valid(v):
+            return 0
+        return len(self.rev_graph[v])
         
     
     def degree(self, v:str) -> int:
@@ -266,6 +806,84 @@ class MyGraph:
     
     ## BFS and DFS searches    
     
+    def _bfs_edges(self, v:str):
+        """
+        Núcleo das procuras em largura: gera os arcos (pai, nodo) da árvore BFS pela ordem
+        em que os nodos são descobertos, sem incluir o nodo de origem.
+        Usa uma deque como fila e um conjunto de visitados, ficando em O(V+E)
+        
+        Parameters
+        ----------
+        :param v: Nodo de origem (tem de existir no grafo)
+        """
+        graph = self.graph
+        probe = self._probe
+        visited = {v}
+        queue = deque([v])
+        while queue:
+            node = queue.popleft()
+            if probe is not None: probe.visit(1, len(graph[node]))
+            for elem in graph[node]:
+                if elem not in visited:
+                    visited.add(elem)
+                    queue.append(elem)
+                    yield node, elem
+    
+    
+    def iter_bfs(self, v:str, dist:bool = False):
+        """
+        Gera, de forma preguiçosa, os nodos atingíveis a partir do nodo especificado
+        (procura em largura), permitindo interromper a procura a qualquer momento
+        
+        Parameters
+        ----------
+        :param v: Nodo de origem
+        :param dist: Se True, gera tuplos (nodo, distância), sendo a distância acumulada ao longo
+            da árvore BFS (igual ao nível do nodo quando o grafo não tem pesos)
+        """
+        if not self._check_valid(v):
+            return
+        if not dist:
+            for _, node in self._bfs_edges(v):
+                yield node
+        else:
+            graph = self.graph
+            dists = {v: 0}
+            for parent, node in self._bfs_edges(v):
+                d = dists[parent] + (graph[parent][node] if self.weighted else 1)
+                dists[node] = d
+                yield node, d
+    
+    
+    def iter_dfs(self, v:str, depth:bool = False):
+        """
+        Gera, de forma preguiçosa, os nodos atingíveis a partir do nodo especificado
+        (procura em profundidade, em pré-ordem), sem recursão
+        
+        Parameters
+        ----------
+        :param v: Nodo de origem
+        :param depth: Se True, gera tuplos (nodo, profundidade na árvore DFS)
+        """
+        if not self._check_valid(v):
+            return
+        graph = self.graph
+        probe = self._probe
+        visited = {v}
+        stack = [iter(graph[v])]
+        while stack:
+            for elem in stack[-1]:
+                if elem not in visited:
+                    visited.add(elem)
+                    if probe is not None: probe.visit(1, len(graph[elem]))
+                    yield (elem, len(stack)) if depth else elem
+                    stack.append(iter(graph[elem]))
+                    break
+            else:
+                stack.pop()
+    
+    
+    @instrumented
     def reachable_bfs(self, v:str) -> list:
         """
         Devolve lista de nodos atingíveis através do nodo especificado
@@ -275,19 +893,11 @@ class MyGraph:
         ----------
         :param v: Nodo do grafo
         """
-        if not self._check_valid(v):
-            return []
-        else:
-            l = [v]
-            res = []
-            while len(l) > 0:
-                node = l.pop(0)
-                if node != v: res.append(node)
-                for elem in self.graph[node]:
-                    if elem not in res and elem not in l and elem != node:
-                        l.append(elem)
-            return res
+        if self._cache is not None and self._check_valid(v):
+            return list(self._bfs_tree(v).dist)[1:]
+        return list(self.iter_bfs(v))
         
+    @instrumented
     def reachable_dfs(self, v:str) -> list:
         """
         Devolve lista de nodos atingíveis através do nodo especificado
@@ -299,49 +909,69 @@ class MyGraph:
         """
         if not self._check_valid(v):
             return []
-        else:
-            l = [v]
-            res = []
-            while len(l) > 0:
-                node = l.pop(0)
-                if node != v: res.append(node)
-                s = 0
-                for elem in self.graph[node]:
-                    if elem not in res and elem not in l:
-                        l.insert(s, elem)
-                        s += 1
-            return res    
+        if self._cache is not None:
+            return list(self._cached(("dfs", v), lambda: self._dfs_order(v)))
+        return self._dfs_order(v)
+    
+    
+    def _dfs_order(self, v:str) -> list:
+        """
+        Ordem de visita de reachable_dfs: os sucessores de cada nodo são colocados no topo da pilha
+        pela ordem da lista de adjacência e marcados como visitados ao serem empilhados (um nodo já
+        empilhado não é movido), ao contrário de iter_dfs, que marca os nodos ao serem expandidos
+        
+        Parameters
+        ----------
+        :param v: Nodo de origem (tem de existir no grafo)
+        """
+        graph = self.graph
+        probe = self._probe
+        visited = {v}
+        stack = [v]
+        res = []
+        while stack:
+            node = stack.pop()
+            if node != v: res.append(node)
+            if probe is not None: probe.visit(1, len(graph[node]))
+            new = [elem for elem in graph[node] if elem not in visited]
+            visited.update(new)
+            stack.extend(reversed(new))
+        return res
     
     
     # distâncias
     
-    def distance(self, o:str, d:str) -> Union[int,None]:
+    @instrumented
+    def distance(self, o:str, d:str, bidirectional:bool = True) -> Union[int,float,None]:
         """
-        Devolve a distância entre 2 nodos
+        Devolve a distância entre 2 nodos: número de arcos do caminho mais curto ou, nos grafos com pesos,
+        a soma mínima dos pesos (Dijkstra), tal como em mean_distances e estimate_distances
         
         Parameters
         ----------
         :param o: Nodo de origem
         :param d: Nodo de destino
+        :param bidirectional: Se True e o grafo não tiver pesos, usa a procura em largura bidirecional
         """
         if not self._check_valid(o):
             return None
         else:
             if o == d: return 0
-            l = [(o,0)]
-            visited = [o]
-            while len(l) > 0:
-                n1,dist = l.pop(0)
-                for n2 in self.graph[n1]:
-                    if n2 == d:
-                        return dist + self.__dist(n1,n2)
-                    elif n2 not in visited:
-                        l.append((n2, dist + self.__dist(n1,n2)))
-                        visited.append(n2)
+            if self.weighted:
+                return self.dijkstra_tree(o, d).distance(d)
+            if self._cache is not None:
+                return self._bfs_tree(o).distance(d)
+            if bidirectional and not self.weighted:
+                path = self._bidirectional_bfs(o, d)
+                return None if path is None else len(path) - 1
+            for node, dist in self.iter_bfs(o, True):
+                if node == d:
+                    return dist
             return None
     
     
-    def shortest_path(self, o:str, d:str) -> Union[list,None]:
+    @instrumented
+    def shortest_path(self, o:str, d:str, bidirectional:bool = True) -> Union[list,None]:
         """
         Devolve o caminho mais curto entre 2 nodos
         
@@ -349,14 +979,15 @@ class MyGraph:
         ----------
         :param o: Nodo de origem
         :param d: Nodo de destino
+        :param bidirectional: Se True e o grafo não tiver pesos, usa a procura em largura bidirecional
         """
         if self.weighted == False:
-            return self._shortest_path(o,d)
+            return self._shortest_path(o,d,bidirectional)
         else:
             return self.dijkstra(o,d)
     
         
-    def _shortest_path(self, o:str, d:str) -> Union[list,None]:
+    def _shortest_path(self, o:str, d:str, bidirectional:bool = True) -> Union[list,None]:
         """
         Devolve o caminho mais curto entre 2 nodos quando o grafo não tem pesos
         
@@ -364,55 +995,92 @@ class MyGraph:
         ----------
         :param o: Nodo de origem
         :param d: Nodo de destino
+        :param bidirectional: Se True, usa a procura em largura bidirecional
         """
         if not self._check_valid(o):
             return None
         else:
             if o == d: return [o,d]
-            l = [(o, [o])]
-            visited = [o]
-            while len(l) > 0:
-                n,path = l.pop(0)
-                for node in self.graph[n]:
-                    if node == d:
-                        return path + [d]
-                    elif node not in visited:
-                        l.append((node,path+[node]))
-                        visited.append(node)
+            if bidirectional:
+                if self._cache is not None:
+                    #Memoriza o resultado da própria procura bidirecional, para que o caminho devolvido
+                    #(entre vários caminhos mínimos possíveis) seja o mesmo com e sem cache
+                    path = self._cached(("bipath", o, d), lambda: self._bidirectional_bfs(o, d))
+                    return None if path is None else list(path)
+                return self._bidirectional_bfs(o, d)
+            if self._cache is not None:
+                path = self._bfs_tree(o).path(d)
+                return None if path is None else path.nodes
+            parents = {}
+            for parent, node in self._bfs_edges(o):
+                parents[node] = parent
+                if node == d:
+                    path = [d]
+                    while node != o:
+                        node = parents[node]
+                        path.append(node)
+                    path.reverse()
+                    return path
             return None
     
     
-    def __dist(self, prev:str, nxt:str) -> Union[int,float]:
+    def _bidirectional_bfs(self, o:str, d:str) -> Union[list,None]:
         """
-        Devolve a distância entre os nodos caso seja um grafo com pesos.
-        Caso não seja, devolve 1
+        Procura em largura bidirecional entre 2 nodos distintos: expande alternadamente, nível a nível,
+        a fronteira mais pequena (a partir da origem pelos sucessores, ou a partir do destino pelos
+        antecessores) até as duas procuras se encontrarem. O caminho é reconstruído pelos apontadores
+        para o pai de cada lado
         
         Parameters
         ----------
-        :param prev: Nodo prévio
-        :param nxt: Nodo seguinte
-        """
-        if self.weighted == True:
-            return self.graph[prev][nxt]
-        else:
-            return 1
-        
-        
-    def _is_in_tuple_list(self, tuple_list:list, node:int) -> bool:
-        """
-        Método auxiliar de reachable_with_dist() que retorna True ou False dependendo de o nodo (que toma 
-        como parâmetro) se encontrar na lista de tuplos ou não.
-
-        Parameters
-        ----------
-        :param tuple_list: A lista de tuplos
-        :param node: O nodo a procurar na lista de tuplos
+        :param o: Nodo de origem
+        :param d: Nodo de destino
         """
-        for (x, y) in tuple_list:
-            if node == x: return True
-        return False
+        graph, rev = self.graph, self.rev_graph
+        probe = self._probe
+        if o not in graph or d not in rev:
+            return None
+        fwd_parent = {o: None}
+        bwd_parent = {d: None}
+        fwd_frontier = [o]
+        bwd_frontier = [d]
+        meet = None
+        while fwd_frontier and bwd_frontier and meet is None:
+            if len(fwd_frontier) <= len(bwd_frontier):
+                frontier, adj, parent, other = fwd_frontier, graph, fwd_parent, bwd_parent
+            else:
+                frontier, adj, parent, other = bwd_frontier, rev, bwd_parent, fwd_parent
+            nxt = []
+            for u in frontier:
+                if probe is not None: probe.visit(1, len(adj.get(u, ())))
+                for v in adj.get(u, ()):
+                    if v not in parent:
+                        parent[v] = u
+                        if v in other:
+                            meet = v
+                            break
+                        nxt.append(v)
+                if meet is not None: break
+            if frontier is fwd_frontier:
+                fwd_frontier = nxt
+            else:
+                bwd_frontier = nxt
+        if meet is None:
+            return None
+        path = []
+        node = meet
+        while node is not None:
+            path.append(node)
+            node = fwd_parent[node]
+        path.reverse()
+        node = bwd_parent[meet]
+        while node is not None:
+            path.append(node)
+            node = bwd_parent[node]
+        return path
     
     
+    @instrumented
     def reachable_with_dist(self, o:str) -> list:
         """
         Devolve uma lista de tuplos contendo os nodos atingíveis e as suas respetivas distâncias
@@ -422,59 +1090,72 @@ class MyGraph:
         ----------
         :param o: Nodo de origem
         """
-        
-        res = []
-        l = [(o,0)]
-        while len(l) > 0:
-            node, dist = l.pop(0)
-            if node != o:
-                res.append((node,dist))
-            for elem in self.graph[node]:
-                if not self._is_in_tuple_list(res, elem) and not self._is_in_tuple_list(l, elem):
-                    l.append((elem, dist + self.__dist(node, elem)))
-        return res
+        if self._cache is not None and self._check_valid(o):
+            return list(self._bfs_tree(o).dist.items())[1:]
+        return list(self.iter_bfs(o, True))
     
-    # DIJKSTRA (Geração do grafo de dijkstra e determinação do caminho mais curto entre 2 nodos)
     
-    def __get_mins(self, distances:dict) -> tuple:
+    def _is_in_tuple_list(self, tuple_list:list, node:int) -> bool:
         """
-        Método auxiliar de dijkstra() que retorna um tuplo com os valores da menor distância e os nodos para os quais 
-        esta se verifica.
-        
+        Retorna True ou False dependendo de o nodo (que toma como parâmetro) se encontrar na lista de tuplos ou não.
+        Obsoleto: reachable_with_dist() deixou de o usar (os nodos visitados são guardados num conjunto);
+        mantido apenas por compatibilidade e será removido numa versão futura
+
         Parameters
         ----------
-        :param distances: Dicionário de distâncias
+        :param tuple_list: A lista de tuplos
+        :param node: O nodo a procurar na lista de tuplos
         """
-        min_dist = math.inf
-        prev_node = min_node = 0
-        for node in distances:
-            for k in distances[node]:
-                if distances[node][k] < min_dist:
-                    prev_node = node
-                    min_node = k
-                    min_dist = distances[node][k]
-        return prev_node, min_node, min_dist
-
-
-    def __get_path(self, djkstr:dict, o:int, d:int) -> str:
+        warnings.warn("MyGraph._is_in_tuple_list está obsoleto e será removido numa versão futura",
+                      DeprecationWarning, stacklevel = 2)
+        return any(node == x for (x, y) in tuple_list)
+    
+    # DIJKSTRA (Geração da árvore de caminhos mais curtos e determinação do caminho mais curto entre 2 nodos)
+    
+    @instrumented
+    def dijkstra_tree(self, o:str, target:str = None) -> Union["PathTree",None]:
         """
-		Método auxiliar de dijkstra() que retorna o caminho mais curto entre o nodo de origem e o nodo de destino
-		de forma legível.
-
-		Parameters
-		----------
-		:param djkstr: O dicionário de distâncias
-		:param o: Nodo de origem
-		:param d: Nodo de destino
-		"""
-        node = d
-        path = [str(d)]
-        while node != o:
-            node = djkstr[node][0]
-            path.insert(0, str(node))
-        return " -> ".join(path) + f" (dist = {djkstr[d][1]})"
+        Devolve a árvore de caminhos mais curtos a partir de um nodo de origem, calculada pelo
+        algoritmo de Dijkstra com uma fila de prioridade (heap binária), em O((V+E) log V).
+        O resultado pode ser reutilizado para obter o caminho para qualquer destino
+        
+        Parameters
+        ----------
+        :param o: Nodo de origem
+        :param target: Nodo de destino opcional (a procura termina quando este é fixado)
+        """
+        if not self._check_valid(o):
+            return None
+        graph = self.graph
+        weighted = self.weighted
+        probe = self._probe
+        dist = {o: 0}
+        prev = {o: None}
+        done = set()
+        heap = [(0, 0, o)]
+        count = 1 #Desempate entre distâncias iguais (os nodos podem não ser comparáveis)
+        while heap:
+            d_node, _, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            if node == target:
+                break
+            if probe is not None: probe.visit(1, len(graph.get(node, {})))
+            for nxt, w in graph.get(node, {}).items():
+                if nxt in done:
+                    continue
+                nd = d_node + (w if weighted else 1)
+                if nxt not in dist or nd < dist[nxt]:
+                    dist[nxt] = nd
+                    prev[nxt] = node
+                    heapq.heappush(heap, (nd, count, nxt))
+                    count += 1
+        #Apenas os nodos fixados têm distância definitiva
+        return PathTree(o, {k: dist[k] for k in dist if k in done}, {k: prev[k] for k in dist if k in done})
 
     
+    @instrumented
     def dijkstra(self, o:int, d:int) -> str:
         """
 		Devolve o caminho mais curto entre 2 nodos implmentando do algoritmo de Dijkstra
@@ -488,27 +1169,212 @@ class MyGraph:
         if not self._check_valid(o) or not self._check_valid(d):
             return None
         else:
-            djkstr = {k: [0, 0] for k in self.graph} # djkstr[k][0] -> proveniência; djkstr[k][1] -> distância ao nodo inicial
-            marked = [o]
-            while d not in marked and len(marked) != len(self.graph):
-                distances = {}
-                for node in marked:
-                    distances[node] = {}
-                    for k in self.graph[node]:
-                        if k not in marked: # de modo a não incluír como destino nodos já marcados no dicionário de distâncias
-                            distances[node][k] = self.__dist(node,k) + djkstr[node][1]
-                            prev_node, min_node, min_dist = self.__get_mins(distances)
-                marked += [min_node]
-                djkstr[min_node][0] = prev_node
-                djkstr[min_node][1] = min_dist
-            if d in marked:
-                return self.__get_path(djkstr, o, d)
+            if self._cache is not None:
+                tree = self._cached(("dijkstra", o), lambda: self.dijkstra_tree(o))
             else:
-                return False    
+                tree = self.dijkstra_tree(o, d)
+            path = tree.path(d)
+            if path is None:
+                return False
+            return str(path)
+    
+
+    # A* (procura dirigida por uma heurística)
+    
+    @instrumented
+    def astar(self, o:str, d:str, heuristic = None) -> Union[GraphPath,None]:
+        """
+        Devolve o caminho mais curto entre 2 nodos (GraphPath) pelo algoritmo A*: os nodos são
+        expandidos por ordem de distância à origem mais a estimativa da heurística, pelo que, com
+        uma boa heurística, a procura expande muito menos nodos do que o algoritmo de Dijkstra
+        (o número de nodos expandidos é registado pela instrumentação, ver instrument).
+        Devolve None se algum nodo não existir ou se o destino não for atingível
+        
+        Parameters
+        ----------
+        :param o: Nodo de origem
+        :param d: Nodo de destino
+        :param heuristic: Função heuristic(nodo, d) que devolve um minorante da distância do nodo
+        ao destino (admissível). Se None, a procura é igual à de Dijkstra com paragem no destino
+        """
+        if not self._check_valid(o) or not self._check_valid(d):
+            return None
+        if heuristic is None:
+            heuristic = lambda v, t: 0
+        graph = self.graph
+        weighted = self.weighted
+        probe = self._probe
+        dist = {o: 0}
+        prev = {o: None}
+        estimate = {o: heuristic(o, d)} #A heurística é calculada uma única vez por nodo
+        heap = [(estimate[o], 0, 0, o)]
+        count = 1
+        while heap:
+            _, _, d_node, node = heapq.heappop(heap)
+            if d_node > dist[node]:
+                continue #Entrada desatualizada (o nodo já foi atingido por um caminho mais curto)
+            if node == d:
+                nodes = [d]
+                while node != o:
+                    node = prev[node]
+                    nodes.append(node)
+                nodes.reverse()
+                return GraphPath(nodes, d_node)
+            if probe is not None: probe.visit(1, len(graph.get(node, {})))
+            for nxt, w in graph.get(node, {}).items():
+                nd = d_node + (w if weighted else 1)
+                if nxt not in dist or nd < dist[nxt]:
+                    dist[nxt] = nd
+                    prev[nxt] = node
+                    if nxt not in estimate:
+                        estimate[nxt] = heuristic(nxt, d)
+                    #Um nodo já expandido volta à fila se a heurística não for consistente
+                    heapq.heappush(heap, (nd + estimate[nxt], count, nd, nxt))
+                    count += 1
+        return None
+    
+    
+    # K CAMINHOS MAIS CURTOS (algoritmo de Yen)
+    
+    def _restricted_dijkstra(self, o, d, to_target:dict, banned_nodes:set, banned_edges:set) -> Union[GraphPath,None]:
+        """
+        Devolve o caminho mais curto entre 2 nodos (válidos) que não passa pelos nodos nem pelos
+        arcos proibidos (None se não existir). As distâncias ao destino no grafo sem restrições
+        são usadas como potencial (A*): a procura é dirigida ao destino, ignora os nodos que não o
+        atingem e termina quando este é fixado
+        
+        Parameters
+        ----------
+        :param o: Nodo de origem
+        :param d: Nodo de destino
+        :param to_target: Dicionário {nodo: distância ao destino} no grafo sem restrições
+        :param banned_nodes: Conjunto de nodos que não podem ser visitados
+        :param banned_edges: Conjunto de arcos (origem, destino) que não podem ser percorridos
+        """
+        graph = self.graph
+        weighted = self.weighted
+        probe = self._probe
+        dist = {o: 0}
+        prev = {o: None}
+        done = set()
+        heap = [(to_target[o], 0, o)]
+        count = 1
+        while heap:
+            _, _, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            if node == d:
+                nodes = [d]
+                while node != o:
+                    node = prev[node]
+                    nodes.append(node)
+                nodes.reverse()
+                return GraphPath(nodes, dist[d])
+            done.add(node)
+            if probe is not None: probe.visit(1, len(graph.get(node, {})))
+            d_node = dist[node]
+            for nxt, w in graph.get(node, {}).items():
+                if nxt in done or nxt not in to_target or nxt in banned_nodes or (node, nxt) in banned_edges:
+                    continue
+                nd = d_node + (w if weighted else 1)
+                if nxt not in dist or nd < dist[nxt]:
+                    dist[nxt] = nd
+                    prev[nxt] = node
+                    heapq.heappush(heap, (nd + to_target[nxt], count, nxt))
+                    count += 1
+        return None
+    
+    
+    def iter_shortest_paths(self, o:str, d:str):
+        """
+        Gerador dos caminhos sem ciclos entre 2 nodos, por ordem crescente de distância (algoritmo
+        de Yen). Os caminhos são calculados apenas quando pedidos, pelo que obter mais um caminho
+        custa apenas o trabalho incremental:
+        - cada caminho só gera desvios a partir do ponto onde se afastou do caminho que lhe deu
+          origem (melhoria de Lawler), uma vez que os desvios anteriores já foram considerados;
+        - a árvore de caminhos mais curtos até ao destino é calculada uma única vez e reutilizada:
+          se o caminho da árvore a partir do nodo de desvio respeitar as restrições, é usado
+          diretamente; caso contrário, as suas distâncias guiam a procura restrita
+        
+        Parameters
+        ----------
+        :param o: Nodo de origem
+        :param d: Nodo de destino
+        """
+        if not self._check_valid(o) or not self._check_valid(d):
+            return
+        tree = self.reversed_view().dijkstra_tree(d) #Caminhos mais curtos de todos os nodos até 'd'
+        to_target = tree.dist
+        if o not in to_target:
+            return
+        graph = self.graph
+        weighted = self.weighted
+        
+        def tree_path(v) -> list:
+            nodes = [v]
+            while v != d:
+                v = tree.prev[v]
+                nodes.append(v)
+            return nodes
+        
+        found = {} #{prefixo de um caminho já devolvido: nodos seguintes nesses caminhos}
+        first = tree_path(o)
+        seen = {tuple(first)}
+        candidates = [] #Heap de (distância, desempate, caminho, índice do desvio)
+        count = 0
+        path, dev = GraphPath(first, to_target[o]), 0
+        while True:
+            yield path
+            nodes = path.nodes
+            for i in range(len(nodes) - 1):
+                found.setdefault(tuple(nodes[:i + 1]), set()).add(nodes[i + 1])
+            root_dist = 0
+            for i in range(len(nodes) - 1):
+                if i >= dev:
+                    spur = nodes[i]
+                    root = nodes[:i]
+                    banned_nodes = set(root)
+                    banned_next = found[tuple(nodes[:i + 1])]
+                    spur_nodes = tree_path(spur)
+                    if spur_nodes[1] in banned_next or not banned_nodes.isdisjoint(spur_nodes):
+                        spur_path = self._restricted_dijkstra(spur, d, to_target, banned_nodes,
+                                                              {(spur, nxt) for nxt in banned_next})
+                    else:
+                        spur_path = GraphPath(spur_nodes, to_target[spur])
+                    if spur_path is not None:
+                        total = root + spur_path.nodes
+                        key = tuple(total)
+                        if key not in seen:
+                            seen.add(key)
+                            heapq.heappush(candidates, (root_dist + spur_path.dist, count, total, i))
+                            count += 1
+                root_dist += graph[nodes[i]][nodes[i + 1]] if weighted else 1
+            if not candidates:
+                return
+            dist, _, total, dev = heapq.heappop(candidates)
+            path = GraphPath(total, dist)
+    
+    
+    @instrumented
+    def k_shortest_paths(self, o:str, d:str, k:int) -> Union[list,None]:
+        """
+        Devolve os k caminhos sem ciclos mais curtos entre 2 nodos (objetos GraphPath), por ordem
+        crescente de distância (ver iter_shortest_paths). Devolve None se algum nodo não existir
+        
+        Parameters
+        ----------
+        :param o: Nodo de origem
+        :param d: Nodo de destino
+        :param k: Número máximo de caminhos
+        """
+        if not self._check_valid(o) or not self._check_valid(d):
+            return None
+        return list(islice(self.iter_shortest_paths(o, d), k))
     
 
     ## cycles
 
+    @instrumented
     def node_has_cycle (self, v:str) -> bool:
         """
         Verifica se um nodo tem um caminho que forma um ciclo
@@ -519,21 +1385,105 @@ class MyGraph:
         """
         if v not in self.graph:
             return False
-        l = [v]
-        visited = [v]
-        while len(l) > 0:
-            node = l.pop(0)
-            for elem in self.graph[node]:
-                if elem == v: return True
-                elif elem not in visited:
-                    l.append(elem)
-                    visited.append(elem)
+        preds = self.rev_graph[v]
+        if v in preds:
+            return True
+        for node in self.iter_bfs(v):
+            if node in preds: return True #Existe um arco de volta para 'v'
         return False
 
+    @instrumented
     def has_cycle(self) -> bool:
         """
         Verifica se o grafo tem algum caminho que forma um ciclo
+        (existe um ciclo se alguma componente fortemente conexa tem mais de um nodo ou um lacete)
         """
-        for v in self.graph.keys():
-            if self.node_has_cycle(v): return True
+        for comp in self.strongly_connected_components():
+            if len(comp) > 1 or comp[0] in self.graph.get(comp[0], ()):
+                return True
         return False
+    
+    
+    ## strongly connected components
+    
+    @instrumented
+    def strongly_connected_components(self) -> list:
+        """
+        Devolve a lista das componentes fortemente conexas do grafo (algoritmo de Tarjan,
+        implementado de forma iterativa, em O(V+E)). As componentes são devolvidas
+        por ordem topológica inversa (uma componente surge antes das que a atingem)
+        """
+        graph = self.graph
+        index = {}
+        low = {}
+        on_stack = set()
+        stack = []
+        comps = []
+        counter = 0
+        for root in graph:
+            if root in index:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(graph[root]))] #Pilha de chamadas explícita (sem recursão)
+            while work:
+                node, it = work[-1]
+                for nxt in it:
+                    if nxt not in index:
+                        index[nxt] = low[nxt] = counter
+                        counter += 1
+                        stack.append(nxt)
+                        on_stack.add(nxt)
+                        work.append((nxt, iter(graph.get(nxt, ()))))
+                        break
+                    elif nxt in on_stack:
+                        low[node] = min(low[node], index[nxt])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]: #'node' é a raiz de uma componente
+                        comp = []
+                        while True:
+                            w = stack.pop()
+                            on_stack.discard(w)
+                            comp.append(w)
+                            if w == node: break
+                        comps.append(comp)
+        if self._probe is not None:
+            self._probe.visit(len(index), sum(len(graph.get(v, ())) for v in index))
+        return comps
+    
+    
+    def condensation(self) -> tuple:
+        """
+        Devolve um tuplo (dag, componentes, membership) em que 'dag' é o grafo acíclico (MyGraph)
+        obtido ao contrair cada componente fortemente conexa num nodo (identificado pelo índice
+        da componente na lista 'componentes') e 'membership' associa cada nodo à sua componente
+        """
+        comps = self.strongly_connected_components()
+        membership = {}
+        for i, comp in enumerate(comps):
+            for v in comp:
+                membership[v] = i
+        dag = {i: {} for i in range(len(comps))}
+        for v in self.graph:
+            cv = membership[v]
+            for d in self.graph[v]:
+                cd = membership[d]
+                if cv != cd:
+                    dag[cv][cd] = None
+        return MyGraph(dag), comps, membership
+    
+    
+    def largest_scc(self) -> list:
+        """
+        Devolve a maior componente fortemente conexa do grafo (núcleo fortemente conexo)
+        """
+        comps = self.strongly_connected_components()
+        if len(comps) == 0:
+            return []
+        return max(comps, key = len)
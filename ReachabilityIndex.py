@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+"""
+Class: ReachabilityIndex
+"""
+
+
+class ReachabilityIndex:
+
+    """
+    Índice de atingibilidade (fecho transitivo) de um grafo, construído sobre a condensação
+    em componentes fortemente conexas: cada componente guarda um bitset (inteiro de Python)
+    com as componentes que atinge, pelo que as consultas não percorrem o grafo
+    """
+
+    def __init__(self, g):
+        """
+        Constrói o índice para o grafo especificado
+
+        Parameters
+        ----------
+        :param g: Grafo (MyGraph ou subclasse)
+        """
+        self.graph = g
+        self.build()
+
+
+    def build(self):
+        """
+        (Re)constrói o índice completo a partir do grafo, em O(V+E) mais as operações sobre os bitsets
+        """
+        g = self.graph
+        dag, comps, membership = g.condensation()
+        self.comps = comps
+        self.membership = membership
+        #Uma componente atinge-se a si própria se tiver mais de um nodo ou um lacete
+        self.cyclic = [len(c) > 1 or c[0] in g.graph.get(c[0], ()) for c in comps]
+        bits = []
+        for i in range(len(comps)): #As componentes estão por ordem topológica inversa
+            b = (1 << i) if self.cyclic[i] else 0
+            for j in dag.graph[i]:
+                b |= (1 << j) | bits[j]
+            bits.append(b)
+        self.bits = bits
+        self.version = g.version
+
+
+    def _check_version(self):
+        """
+        Reconstrói o índice caso o grafo tenha sido alterado sem que o índice fosse atualizado
+        """
+        if self.version != self.graph.version:
+            self.build()
+
+
+    def _in_sync(self) -> bool:
+        """
+        Verifica se a única alteração ao grafo desde a última atualização do índice é aquela que
+        está a ser notificada (o grafo incrementa a versão antes de notificar o índice)
+        """
+        return self.version == self.graph.version - 1
+
+
+    def touch(self):
+        """
+        Regista uma alteração ao grafo que não afeta a atingibilidade (p.e. alteração de pesos)
+        """
+        if self._in_sync():
+            self.version = self.graph.version
+
+
+    def add_vertex(self, v):
+        """
+        Atualiza o índice após a adição de um nodo ao grafo
+
+        Parameters
+        ----------
+        :param v: Nodo adicionado
+        """
+        if not self._in_sync():
+            self.build()
+            return
+        if v not in self.membership:
+            self.membership[v] = len(self.comps)
+            self.comps.append([v])
+            self.cyclic.append(False)
+            self.bits.append(0)
+        self.version = self.graph.version
+
+
+    def add_edge(self, o, d):
+        """
+        Atualiza o índice de forma incremental após a adição de um arco ao grafo.
+        Se o arco fechar um ciclo entre componentes distintas, o índice é reconstruído
+
+        Parameters
+        ----------
+        :param o: Nodo origem
+        :param d: Nodo destino
+        """
+        if not self._in_sync() or o not in self.membership or d not in self.membership:
+            self.build()
+            return
+        co, cd = self.membership[o], self.membership[d]
+        bits = self.bits
+        if co == cd:
+            if not self.cyclic[co]:
+                self.cyclic[co] = True
+                bits[co] |= 1 << co
+        elif (bits[cd] >> co) & 1: #'d' já atingia 'o': as componentes fundem-se num ciclo
+            self.build()
+            return
+        elif not (bits[co] >> cd) & 1:
+            add = (1 << cd) | bits[cd]
+            for i in range(len(bits)):
+                if i == co or (bits[i] >> co) & 1:
+                    bits[i] |= add
+        self.version = self.graph.version
+
+
+    def reaches(self, u, v) -> bool:
+        """
+        Verifica se existe um caminho (com pelo menos um arco) do nodo 'u' para o nodo 'v'
+
+        Parameters
+        ----------
+        :param u: Nodo de origem
+        :param v: Nodo de destino
+        """
+        self._check_version()
+        cu = self.membership.get(u)
+        cv = self.membership.get(v)
+        if cu is None or cv is None:
+            return False
+        return bool((self.bits[cu] >> cv) & 1)
+
+
+    def reachable_set(self, u) -> set:
+        """
+        Devolve o conjunto de nodos atingíveis a partir do nodo 'u' (inclui 'u' apenas se este
+        pertencer a um ciclo)
+
+        Parameters
+        ----------
+        :param u: Nodo de origem
+        """
+        self._check_version()
+        cu = self.membership.get(u)
+        if cu is None:
+            return set()
+        res = set()
+        b = self.bits[cu]
+        while b:
+            low = b & -b
+            res.update(self.comps[low.bit_length() - 1])
+            b ^= low
+        return res
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+"""
+Class: StoichiometricMatrix
+"""
+
+import numpy as np
+
+
+class StoichiometricMatrix:
+
+    """
+    Matriz estequiométrica esparsa (metabolitos x reações) em formato CSR: os coeficientes do metabolito i
+    são data[indptr[i]:indptr[i+1]], nas colunas indices[indptr[i]:indptr[i+1]]. Os coeficientes são
+    negativos para os substratos e positivos para os produtos ('substrate' e 'product' indicam o papel
+    de cada coeficiente guardado), e cada reação tem um indicador de reversibilidade. Graus e
+    conectividade são calculados por operações vetoriais sobre as arrays
+    """
+
+    def __init__(self, metabolites:list, reactions:list, rows, cols, values, reversible):
+        """
+        Constrói a matriz a partir de triplos (linha, coluna, coeficiente). Os coeficientes repetidos
+        para o mesmo par (p.e. "m10 + m10") são somados; um metabolito que é substrato e produto da mesma
+        reação pode ficar com coeficiente 0, mas continua guardado (com os indicadores 'substrate' e 'product')
+
+        Parameters
+        ----------
+        :param metabolites: Lista com o nome de cada metabolito (linhas)
+        :param reactions: Lista com o identificador de cada reação (colunas)
+        :param rows: Índices das linhas (metabolitos) dos triplos
+        :param cols: Índices das colunas (reações) dos triplos
+        :param values: Coeficientes dos triplos
+        :param reversible: Indicador de reversibilidade de cada reação
+        """
+        self.metabolites = list(metabolites)
+        self.reactions = list(reactions)
+        self.met_index = {m: i for i, m in enumerate(self.metabolites)}
+        self.reac_index = {r: j for j, r in enumerate(self.reactions)}
+        self.reversible = np.asarray(reversible, dtype = np.bool_)
+        if len(self.reversible) != len(self.reactions):
+            raise ValueError("O vetor de reversibilidade deve ter uma posição por reação")
+        n_m, n_r = self.shape
+        rows = np.asarray(rows, dtype = np.int64)
+        cols = np.asarray(cols, dtype = np.int64)
+        values = np.asarray(values, dtype = np.float64)
+        if not (len(rows) == len(cols) == len(values)):
+            raise ValueError("As arrays dos triplos devem ter o mesmo tamanho")
+
+        #Soma dos triplos repetidos: ordena por (linha, coluna) e agrega os pares iguais
+        keys, inverse = np.unique(rows * n_r + cols, return_inverse = True)
+        inverse = inverse.ravel()
+        self.data = np.bincount(inverse, weights = values, minlength = len(keys))
+        self.substrate = np.bincount(inverse, weights = values < 0, minlength = len(keys)) > 0
+        self.product = np.bincount(inverse, weights = values > 0, minlength = len(keys)) > 0
+        self.indices = keys % max(n_r, 1)
+        self.indptr = np.zeros(n_m + 1, dtype = np.int64)
+        np.cumsum(np.bincount(keys // max(n_r, 1), minlength = n_m), out = self.indptr[1:])
+
+
+    @classmethod
+    def from_network(cls, net) -> "StoichiometricMatrix":
+        """
+        Constrói a matriz a partir dos coeficientes lidos por MetabolicNetwork.load_from_lines
+
+        Parameters
+        ----------
+        :param net: Rede metabólica
+        """
+        st = net.stoichiometry
+        if st is None:
+            raise ValueError("A rede não tem coeficientes estequiométricos (não foi lida a partir de reações)")
+        return cls(st["metabolites"], st["reactions"], st["rows"], st["cols"], st["values"], st["reversible"])
+
+
+    @property
+    def shape(self) -> tuple:
+        return len(self.metabolites), len(self.reactions)
+
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+
+    def row_indices(self):
+        """
+        Devolve a array com a linha (metabolito) de cada coeficiente guardado
+        """
+        return np.repeat(np.arange(len(self.metabolites)), np.diff(self.indptr))
+
+
+    def to_dense(self):
+        """
+        Devolve a matriz completa (array NumPy metabolitos x reações)
+        """
+        dense = np.zeros(self.shape)
+        dense[self.row_indices(), self.indices] = self.data
+        return dense
+
+
+    def dot(self, v):
+        """
+        Produto S.v (p.e. taxas de produção dos metabolitos dado um vetor de fluxos das reações)
+
+        Parameters
+        ----------
+        :param v: Vetor com um valor por reação
+        """
+        v = np.asarray(v, dtype = np.float64)
+        return np.bincount(self.row_indices(), weights = self.data * v[self.indices], minlength = self.shape[0])
+
+
+    def rdot(self, x):
+        """
+        Produto S^T.x (um valor por reação)
+
+        Parameters
+        ----------
+        :param x: Vetor com um valor por metabolito
+        """
+        x = np.asarray(x, dtype = np.float64)
+        return np.bincount(self.indices, weights = self.data * x[self.row_indices()], minlength = self.shape[1])
+
+
+    def get_coefficient(self, met:str, reac:str) -> float:
+        """
+        Devolve o coeficiente de um metabolito numa reação (0 se não participar)
+
+        Parameters
+        ----------
+        :param met: Metabolito
+        :param reac: Reação
+        """
+        i, j = self.met_index[met], self.reac_index[reac]
+        start, end = self.indptr[i], self.indptr[i + 1]
+        pos = start + np.searchsorted(self.indices[start:end], j)
+        if pos < end and self.indices[pos] == j:
+            return float(self.data[pos])
+        return 0.0
+
+
+    def connectivity(self):
+        """
+        Devolve um tuplo de arrays (número de reações em que cada metabolito participa,
+        número de metabolitos de cada reação)
+        """
+        return np.diff(self.indptr), np.bincount(self.indices, minlength = self.shape[1])
+
+
+    def metabolite_degrees(self, deg_type:str = "inout"):
+        """
+        Devolve a array dos graus de cada metabolito na rede metabolito-reação (sem separação das reações
+        reversíveis): o grau de entrada conta as reações que produzem o metabolito e o de saída as que o
+        consomem, contando as reações reversíveis nos dois sentidos; o grau 'inout' conta as reações
+        em que o metabolito participa (vizinhos distintos, como em MetabolicNetwork.all_degrees)
+
+        Parameters
+        ----------
+        :param deg_type: Define o tipo de graus a serem calculados ('in', 'out' ou 'inout')
+        """
+        deg_type = deg_type.lower()
+        assert deg_type in ["in","out","inout"], "Parâmetro 'deg_type' deve ser 'in','out','inout'"
+        if deg_type == "inout":
+            return np.diff(self.indptr)
+        role = self.product if deg_type == "in" else self.substrate
+        weights = role | self.reversible[self.indices]
+        return np.bincount(self.row_indices(), weights = weights, minlength = self.shape[0]).astype(np.int64)
+
+
+    def reaction_degrees(self, deg_type:str = "inout"):
+        """
+        Devolve a array dos graus de cada reação na rede metabolito-reação (sem separação das reações
+        reversíveis): o grau de entrada conta os substratos e o de saída os produtos (todos os
+        metabolitos, nos dois casos, se a reação for reversível); o grau 'inout' conta os metabolitos
+        que participam na reação
+
+        Parameters
+        ----------
+        :param deg_type: Define o tipo de graus a serem calculados ('in', 'out' ou 'inout')
+        """
+        deg_type = deg_type.lower()
+        assert deg_type in ["in","out","inout"], "Parâmetro 'deg_type' deve ser 'in','out','inout'"
+        if deg_type == "inout":
+            return np.bincount(self.indices, minlength = self.shape[1])
+        role = self.substrate if deg_type == "in" else self.product
+        weights = role | self.reversible[self.indices]
+        return np.bincount(self.indices, weights = weights, minlength = self.shape[1]).astype(np.int64)
+
+
+    def degrees(self, deg_type:str = "inout") -> dict:
+        """
+        Devolve um dicionário com os graus de metabolitos e reações (no formato de MetabolicNetwork.all_degrees
+        para uma rede 'metabolite-reaction' sem separação das reações reversíveis)
+
+        Parameters
+        ----------
+        :param deg_type: Define o tipo de graus a serem calculados ('in', 'out' ou 'inout')
+        """
+        degs = dict(zip(self.metabolites, self.metabolite_degrees(deg_type).tolist()))
+        degs.update(zip(self.reactions, self.reaction_degrees(deg_type).tolist()))
+        return degs
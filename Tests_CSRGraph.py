@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+from MyGraph import MyGraph, GraphPath
+from MetabolicNetwork import MetabolicNetwork
+
+class Test_CSRGraph(unittest.TestCase):
+    def setUp(self) -> None:
+        self.gr = MyGraph( {1:{2:0}, 2:{3:3}, 3:{2:1,4:2}, 4:{2:0}}, w=True ).freeze()
+        self.gr2 = MyGraph({1:{2:None}, 2:{3:None}, 3:{2:None,4:None}, 4:{2:None}}).to_csr()
+        self.g3 = MyGraph( {1:{2:2, 3:5}, 2:{1:2, 3:3, 4:1, 5:2}, 3:{1:5, 2:3, 4:1, 5:2},
+                   4:{2:1, 3:1, 5:2, 6:7}, 5:{2:2, 3:2, 4:2, 6:3}, 6:{4:7, 5:3}}, w=True).freeze()
+
+    def test_basic(self):
+        self.assertEqual(self.gr.get_nodes(),[1, 2, 3, 4])
+        self.assertEqual(self.gr.size(),(4, 5))
+        self.assertEqual(self.gr.get_successors(3),[2, 4])
+        self.assertEqual(self.gr2.get_predecessors(2),[1, 3, 4])
+        self.assertEqual(self.gr2.in_degree(2),3)
+        self.assertEqual(self.gr2.out_degree(2),1)
+        self.assertEqual(self.gr2.degree(2),3)
+        self.assertEqual(self.gr.weights.typecode,"q")
+
+    def test_traversal(self):
+        self.assertEqual(self.gr.distance(1,4),5)
+        self.assertEqual(self.gr.shortest_path(1,4),'1 -> 2 -> 3 -> 4 (dist = 5)')
+        self.assertEqual(self.gr2.shortest_path(1,4),[1, 2, 3, 4])
+        self.assertEqual(self.gr2.shortest_path(2,1),None)
+        self.assertEqual(self.gr2.reachable_with_dist(1),[(2, 1), (3, 2), (4, 3)])
+        self.assertEqual(self.g3.reachable_dfs(1),[2, 4, 6, 5, 3])
+        self.assertEqual(self.g3.dijkstra_tree(1).path(6),GraphPath([1, 2, 5, 6], 7))
+
+    def test_roundtrip(self):
+        test = MetabolicNetwork("metabolite-reaction")
+        test.load_from_file("temp.txt")
+        csr = test.freeze()
+        self.assertEqual(csr.to_graph().graph, test.graph)
+        for v in test.get_nodes():
+            self.assertEqual(csr.reachable_bfs(v), test.reachable_bfs(v))
+            self.assertEqual(sorted(csr.get_predecessors(v)), sorted(test.get_predecessors(v)))
+
+    def test_all_pairs(self):
+        stats = self.gr2.all_pairs_stats(processes=1)
+        self.assertEqual(stats["pairs"],9)
+        self.assertEqual(stats["histogram"],{1: 5, 2: 3, 3: 1})
+        self.assertEqual(stats["reachable_fraction"],0.75)
+        self.assertEqual(self.gr2.all_pairs_stats(processes=2, chunksize=1),stats)
+        self.assertEqual(self.g3.all_pairs_stats(processes=1)["histogram"][7],2)
+
+    def test_betweenness(self):
+        self.assertEqual(self.gr2.betweenness(),[0.0, 3.0, 2.0, 0.0])
+        self.assertEqual(self.g3.betweenness(),[0.0, 8.0, 0.0, 4.0, 8.0, 0.0])
+        self.assertEqual(self.g3.betweenness([0]),[0.0, 4.0, 0.0, 1.0, 1.0, 0.0])
+        self.assertEqual(self.g3.betweenness(processes=2, chunksize=2),self.g3.betweenness())
+        #Caminhos empatados com um arco de peso 0: 2 -> 0 -> 3 e 2 -> 1 -> 3 (distância 2)
+        zero = MyGraph({0:{1:1, 3:0}, 1:{3:1}, 2:{0:2, 1:1}, 3:{0:1}}, w=True).freeze()
+        self.assertEqual(zero.betweenness(processes=1),[1.5, 0.5, 0.0, 1.0])
+
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, "g3.snap")
+            g = MyGraph( {1:{2:2.5, 3:5}, 2:{3:1}, 3:{}, "x":{}}, w=True )
+            g.save(fname)
+            frozen = MyGraph.load(fname, frozen=True)
+            self.assertEqual(frozen.get_nodes(),[1, 2, 3, "x"])
+            self.assertEqual(frozen.dijkstra(1,3),"1 -> 2 -> 3 (dist = 3.5)")
+            self.assertEqual(frozen.get_predecessors(3),[1, 2])
+            self.assertEqual(frozen.all_pairs_stats(processes=2)["pairs"],3)
+            del frozen
+            self.assertEqual(MyGraph.load(fname).graph,g.graph)
+            self.assertEqual(MyGraph.load(fname, use_mmap=False).rev_graph,g.rev_graph)
+            self.assertRaises(TypeError, MyGraph({(1, 2):{}}).save, fname)
+            net = MetabolicNetwork("metabolite-reaction")
+            net.load_from_file("temp.txt")
+            net.save(fname)
+            frozen = MetabolicNetwork.load(fname, frozen=True)
+            self.assertEqual(frozen.meta["node_types"], net.node_types)
+            self.assertEqual(frozen.meta["net_type"], "metabolite-reaction")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+from GraphGenerator import GraphGenerator
+from GraphBenchmark import GraphBenchmark
+
+class Test_GraphGenerator(unittest.TestCase):
+    def test_erdos_renyi(self):
+        g1 = GraphGenerator(7).erdos_renyi(200, 0.02, weighted=True)
+        g2 = GraphGenerator(7).erdos_renyi(200, 0.02, weighted=True)
+        self.assertEqual(g1.graph,g2.graph)
+        self.assertEqual(g1.size()[0],200)
+        self.assertTrue(all(v not in g1.graph[v] for v in g1.graph))
+        self.assertEqual(GraphGenerator(1).erdos_renyi(5, 1.0).size(),(5, 20))
+        self.assertEqual(GraphGenerator(1).erdos_renyi(5, 0.0).size(),(5, 0))
+        self.assertRaises(ValueError, GraphGenerator().erdos_renyi, 5, 2)
+
+    def test_barabasi_albert(self):
+        g = GraphGenerator(3).barabasi_albert(100, 2)
+        self.assertEqual(g.size(),(100, 2 * 2 * 98))
+        self.assertTrue(all(u in g.graph[v] for u in g.graph for v in g.graph[u]))
+        self.assertRaises(ValueError, GraphGenerator().barabasi_albert, 2, 2)
+
+    def test_metabolic_network(self):
+        lines = GraphGenerator(5).reaction_lines(30, 20)
+        self.assertEqual(lines,GraphGenerator(5).reaction_lines(30, 20))
+        self.assertEqual(len(lines),20)
+        self.assertTrue(lines[0].startswith("R1: "))
+        net = GraphGenerator(5).metabolic_network(30, 20)
+        self.assertEqual(len(net.get_nodes_type("reaction")),20)
+        self.assertTrue(len(net.get_nodes_type("metabolite")) <= 30)
+
+    def test_benchmark(self):
+        res = GraphBenchmark((40,), repeat=1, sources=3).run()
+        self.assertIn("er-40/dijkstra",res["results"])
+        self.assertIn("metabolic-40/all_pairs",res["results"])
+        base = {"results": {k: t * 10 for k, t in res["results"].items()}}
+        self.assertEqual(GraphBenchmark.compare(res, base),[])
+        base["results"]["er-40/bfs"] = res["results"]["er-40/bfs"] / 10
+        self.assertEqual([r[0] for r in GraphBenchmark.compare(res, base)],["er-40/bfs"])
+
+if __name__ == '__main__':
+    unittest.main()
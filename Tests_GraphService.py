@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+from GraphService import GraphServer, GraphClient
+from MetabolicNetwork import MetabolicNetwork
+
+class Test_GraphService(unittest.TestCase):
+    def setUp(self) -> None:
+        self.net = MetabolicNetwork("metabolite-reaction")
+        self.net.load_from_file("temp.txt")
+        self.server = GraphServer({"temp": self.net}, port=0)
+        self.host, self.port = self.server.start_background()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def test_queries(self):
+        with GraphClient(self.host, self.port) as client:
+            self.assertEqual(client.networks(),{"temp": "metabolite-reaction"})
+            self.assertEqual(client.query("reachable", "m1"),self.net.reachable_bfs("m1"))
+            self.assertEqual(client.query("distance", "m1", "m3", net="temp"),self.net.distance("m1", "m3"))
+            self.assertEqual(client.query("shortest_path", "m1", "m3"),self.net.shortest_path("m1", "m3"))
+            self.assertEqual(client.query("degree", "r1"),self.net.degree("r1"))
+            self.assertEqual(sorted(client.query("metabolitos_finais", ["m1", "m2"])),
+                             sorted(self.net.metabolitos_finais(["m1", "m2"])))
+            self.assertRaises(RuntimeError, client.query, "add_edge", "m1", "m2")
+            self.assertRaises(RuntimeError, client.query, "distance", "m1", "m3", net="outra")
+            self.assertEqual(client.query("ping"),"pong")
+
+    def test_concurrent(self):
+        results = []
+        def worker():
+            with GraphClient(self.host, self.port) as client:
+                results.append([client.query("reachable", "m1") for _ in range(20)])
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(len(results),4)
+        self.assertTrue(all(r == [self.net.reachable_bfs("m1")] * 20 for r in results))
+
+    def test_errors(self):
+        with GraphClient(self.host, self.port, timeout=10) as client:
+            client.sock.sendall(b'{"op": "ping", "args": ["' + b"x" * 100000 + b'"]}\n') #Acima do limite do stream
+            self.assertIn("demasiado longo", json.loads(client._file.readline())["error"])
+            self.assertEqual(client.query("ping"),"pong")
+        with tempfile.TemporaryDirectory() as tmp:
+            bad = GraphServer(path=os.path.join(tmp, "missing", "graph.sock"))
+            self.assertRaises(OSError, bad.start_background)
+
+    def test_unix(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "graph.sock")
+            server = GraphServer({"temp": self.net}, path=path)
+            server.start_background()
+            try:
+                with GraphClient(path=path) as client:
+                    self.assertEqual(client.query("out_degree", "m1"),3)
+            finally:
+                server.stop()
+
+if __name__ == '__main__':
+    unittest.main()
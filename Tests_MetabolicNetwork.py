@@ -1,10 +1,174 @@
 # -*- coding: utf-8 -*-
 
 from MetabolicNetwork import MetabolicNetwork
+import os
+import tempfile
 import unittest
 
 class TestMetabolic(unittest.TestCase):
     
+    def test_centralities(self):
+        test = MetabolicNetwork("metabolite-metabolite")
+        for v in "abcd":
+            test.add_vertex_type(v)
+        for o, d in [("a", "b"), ("b", "c"), ("c", "a"), ("d", "a")]:
+            test.add_edge(o, d)
+        pr = test.pagerank(tol=1e-10, max_iter=500)
+        self.assertAlmostEqual(sum(pr.values()), 1.0)
+        self.assertEqual(max(pr, key=pr.get), "a")
+        self.assertAlmostEqual(pr["d"], 0.15 / 4)
+        self.assertEqual(test.pagerank(tol=1e-10, max_iter=2, start=pr).keys(), pr.keys())
+        ev = test.eigenvector_centrality(tol=1e-10, max_iter=1000)
+        self.assertAlmostEqual(ev["d"], 0.0, places=4)
+        self.assertAlmostEqual(ev["a"], ev["b"], places=4)
+        katz = test.katz_centrality(alpha=0.5, normalized=False, tol=1e-12)
+        self.assertAlmostEqual(katz["d"], 1.0)
+        self.assertAlmostEqual(katz["a"], 0.5 * katz["c"] + 0.5 * katz["d"] + 1)
+        self.assertRaises(RuntimeError, test.eigenvector_centrality, 1e-12, 2)
+        
+        test = MetabolicNetwork("metabolite-reaction")
+        test.load_from_file("temp.txt")
+        ev = test.eigenvector_centrality(tol=1e-8, max_iter=1000) #Grafo bipartido
+        self.assertAlmostEqual(sum(x * x for x in ev.values()), 1.0)
+        self.assertEqual(MetabolicNetwork().pagerank(), {})
+        
+        bc = test.all_betweenness(normalized=False)
+        self.assertEqual((bc["r3"], bc["m1"], bc["m2"]), (27.0, 20.0, 0.0))
+        par = test.all_betweenness(processes=2, normalized=False)
+        self.assertEqual({v: round(x, 6) for v, x in par.items()}, {v: round(x, 6) for v, x in bc.items()})
+        self.assertEqual(test.all_betweenness(k=100), test.all_betweenness())
+        self.assertEqual(test.all_betweenness(k=5, seed=2), test.all_betweenness(k=5, seed=2))
+        self.assertRaises(ValueError, test.all_betweenness, True, 1, 0)
+    
+    
+    def test_parser(self):
+        test = MetabolicNetwork("metabolite-reaction", True)
+        stats = test.load_from_file("temp.txt")
+        self.assertEqual({k: stats[k] for k in ("lines", "reactions", "metabolites", "reversible")},
+                         {"lines": 4, "reactions": 4, "metabolites": 10, "reversible": 2})
+        self.assertIs(test.parse_stats, stats)
+        test.add_vertex_type("m1", "reaction") #Já existe como metabolito
+        self.assertNotIn("m1", test.get_nodes_type("reaction"))
+        
+        test = MetabolicNetwork("metabolite-reaction")
+        stats = test.load_from_lines(["R1: A + B => C", "", "R2: C <=> D", "R3: => A"])
+        self.assertEqual((stats["lines"], stats["reactions"], stats["reversible"]), (4, 3, 1))
+        self.assertEqual(test.get_nodes_type(), [["A", "B", "C", "D"], ["R1", "R2", "R3"]])
+        self.assertEqual(test.get_predecessors("R3"), [])
+        self.assertRaises(Exception, test.load_from_lines, ["R1 A => B"])
+        stats = test.load_from_lines(["R1: A => B", "R2: R1 => C"]) #Metabolito com o identificador de uma reação
+        self.assertEqual(stats["skipped_species"], ["R1"])
+        self.assertEqual(test.get_successors("R1"), ["B", "R2"])
+        self.assertEqual(test.stoichiometric_matrix().shape, (3, 2))
+    
+    
+    def test_from_edges(self):
+        test = MetabolicNetwork.from_edges([("a", "b"), ("b", "c")])
+        self.assertIsInstance(test, MetabolicNetwork)
+        self.assertEqual(test.net_type, "metabolite-reaction")
+        self.assertEqual(test.graph, {"a": {"b": None}, "b": {"c": None}, "c": {}})
+        test = MetabolicNetwork.from_edges([("r1", "r2", 2)], True, network_type="reaction-reaction")
+        self.assertEqual(test.get_nodes_type(), ["r1", "r2"])
+        self.assertEqual(test.get_predecessors("r2"), ["r1"])
+        test.add_vertex_type("r1") #Já registado
+        self.assertEqual(test.get_nodes_type(), ["r1", "r2"])
+    
+    
+    def test_expansion(self):
+        test = MetabolicNetwork("metabolite-reaction")
+        test.load_from_lines(["R1: A + B => C", "R2: C => D + A", "R3: D + E => F", "R4: => E", "R5: X => Y"])
+        self.assertEqual(test.metabolitos_finais(["A", "B"]), ["E", "C", "D", "A", "F"])
+        self.assertEqual(test.metabolitos_finais(["A", "B"], generation=True), {"E": 1, "C": 1, "D": 2, "A": 2, "F": 3})
+        self.assertEqual(test.metabolitos_finais(["A"]), ["E"])
+        self.assertEqual(test.metabolitos_finais([], generation=True), {})
+        test.enable_cache()
+        self.assertEqual(test.metabolitos_finais(["A", "B"]), ["E", "C", "D", "A", "F"])
+        test.add_vertex_type("R6", "reaction")
+        test.add_edge("E", "R6")
+        test.add_edge("R6", "Y")
+        self.assertEqual(test.metabolitos_finais(["A", "B"], generation=True)["Y"], 2)
+        
+        matrix, mets = test.scope_matrix([["A", "B"], ["A"], []], [[], ["R2"]])
+        self.assertEqual(matrix.shape, (6, len(mets)))
+        scope = lambda row: sorted(m for m, x in zip(mets, row) if x)
+        self.assertEqual(scope(matrix[0]), sorted(test.metabolitos_finais(["A", "B"])))
+        self.assertEqual(scope(matrix[1]), ["C", "E", "Y"])
+        self.assertEqual(scope(matrix[2]), ["E", "Y"])
+        self.assertFalse(matrix[4].any())
+        par, _ = test.scope_matrix([["A", "B"], ["A"], []], [[], ["R2"]], processes=2, chunksize=1)
+        self.assertTrue((par == matrix).all())
+        self.assertRaises(ValueError, test.scope_matrix, [["A"]], [["R99"]])
+        ko, reactions, mets = test.knockout_scan(["A", "B"])
+        self.assertEqual(ko.shape, (6, len(mets)))
+        self.assertEqual(scope(ko[reactions.index("R4")]), ["A", "C", "D"])
+    
+    
+    def test_projections(self):
+        test = MetabolicNetwork("metabolite-metabolite")
+        test.load_from_file("temp.txt")
+        self.assertIsNotNone(test._pending) #A projeção só é calculada no primeiro acesso ao grafo
+        self.assertEqual(test.get_successors("m1"), ["m3", "m4", "m5", "m6", "m7", "m8"])
+        self.assertIsNone(test._pending)
+        self.assertEqual(list(test.graph), ['m1', 'm3', 'm4', 'm5', 'm6', 'm7', 'm8', 'm2', 'm9', 'm10'])
+        self.assertEqual(test.get_predecessors("m10"), ["m9"])
+    
+        mr = MetabolicNetwork("metabolite-reaction")
+        mr.load_from_file("temp.txt")
+        proj = mr.projection("metabolite-metabolite")
+        self.assertEqual(list(proj.graph.items()), list(test.graph.items()))
+        self.assertEqual(proj.get_nodes_type(), test.get_nodes_type())
+    
+        #Metabolitos excluídos: ficam isolados e não ligam outros metabolitos
+        mm = mr.projection("metabolite-metabolite", currency = ["m1"])
+        self.assertEqual(mm.get_successors("m1"), [])
+        self.assertEqual(mm.get_predecessors("m1"), [])
+        self.assertEqual(mm.get_successors("m6"), ["m7", "m8"])
+        rr = MetabolicNetwork("reaction-reaction", currency = ["m1"])
+        rr.load_from_file("temp.txt")
+        self.assertEqual(rr.graph, {"r1": {"r2": None}, "r2": {}, "r3": {}, "r4": {}})
+        self.assertEqual(mr.projection("reaction-reaction").get_successors("r3"), ["r1", "r2"])
+    
+        self.assertRaises(ValueError, rr.projection, "metabolite-metabolite")
+        self.assertRaises(ValueError, mr.projection, "metabolite-reaction")
+
+        #A projeção pendente não é afetada por alterações posteriores à rede de origem
+        proj = mr.projection("metabolite-metabolite")
+        mr.add_edge("m10", "r1")
+        self.assertEqual(list(proj.graph.items()), list(test.graph.items()))
+    
+        #Carregar uma rede que já tem nodos acrescenta os arcos da projeção aos existentes
+        extra = MetabolicNetwork("metabolite-metabolite")
+        extra.add_vertex("X")
+        extra.add_edge("X", "m1")
+        extra.load_from_file("temp.txt")
+        self.assertEqual(extra.get_nodes()[:3], ["X", "m1", "m3"])
+        self.assertEqual(extra.get_predecessors("m1"), ["X"] + test.get_predecessors("m1"))
+        self.assertEqual(extra.get_successors("m1"), test.get_successors("m1"))
+    
+
+    def test_instrumentation(self):
+        #A -> R1 -> B -> R2 -> C: nodos visitados e arcos percorridos por cada estatística
+        test = MetabolicNetwork("metabolite-reaction")
+        test.load_from_lines(["R1: A => B", "R2: B => C"])
+        with test.instrument() as report:
+            test.mean_degree("inout")
+            test.mean_distances()
+            test.metabolitos_finais(["A"])
+            test.mean_clustering_coef()
+        counts = {k: (v["nodes"], v["edges"]) for k, v in report.items()}
+        self.assertEqual(counts["all_degrees"], (5, 4))
+        self.assertEqual(counts["mean_degree"], (5, 4))
+        self.assertEqual(counts["all_pairs_stats"], (15, 10))
+        self.assertEqual(counts["mean_distances"], (15, 10))
+        self.assertEqual(counts["metabolitos_finais"], (5, 4))
+        self.assertEqual(counts["mean_clustering_coef"], (5, 14))
+        with test.instrument() as report:
+            test.all_betweenness(processes = 2)
+            test.scope_matrix([["A"], ["B"]], processes = 2, chunksize = 1)
+        self.assertEqual((report["all_betweenness"]["nodes"], report["all_betweenness"]["edges"]), (15, 10))
+        self.assertEqual((report["scope_matrix"]["nodes"], report["scope_matrix"]["edges"]), (8, 6))
+    
+    
     def test_manual(self):
         #METABOLITOS
         test1 = MetabolicNetwork("metabolite-metabolite")
@@ -66,6 +230,14 @@ class TestMetabolic(unittest.TestCase):
         self.assertEqual(test.prob_degree("inout"), {3: 0.1429, 1: 0.5714,
                                                       2: 0.1429, 4: 0.1429})
         self.assertEqual(test.mean_distances(), 2.2308)
+        self.assertEqual(test.mean_distances(processes=2), 2.2308)
+        weighted = MetabolicNetwork.from_edges([("a", "b", 10), ("a", "c", 1), ("c", "b", 1)], True,
+                                               network_type="metabolite-metabolite")
+        self.assertEqual(weighted.mean_distances(), 1.3333) #d(a,b) = 2 (por c), e não 10
+        self.assertEqual(weighted.estimate_distances(3, seed=1)["mean_distance"], weighted.mean_distances())
+        est = test.estimate_distances(100, seed=1) #Amostra de todos os nodos: estimativa exata
+        self.assertEqual((est["mean_distance"], est["std_error"], est["sources"]), (2.2308, 0.0, 14))
+        self.assertEqual(test.estimate_distances(5, seed=3), test.estimate_distances(5, seed=3))
         self.assertEqual(test.mean_clustering_perdegree("inout"), {3: 0.0, 1: 0.0, 2: 0.0, 4: 0.0})
         self.assertEqual(test.metabolitos_finais(["qualquercoisa"]), [])
         
@@ -76,6 +248,15 @@ class TestMetabolic(unittest.TestCase):
                                                  ['r1', 'r2', 'r3', 'r3_b', 'r4', 'r4_b']])
         
         
+        sub = test.subgraph_view(["m1", "m2", "m3", "r1"])
+        self.assertEqual(sub.get_nodes_type(), [['m1', 'm2', 'm3'], ['r1']])
+        self.assertEqual(sub.all_degrees("in"), {"m1": 0, "m2": 0, "m3": 1, "r1": 2})
+        self.assertEqual(sub.metabolitos_finais(["m1", "m2"]), ["m3"])
+        self.assertEqual(sorted(sub._node_type_of), ["m1", "m2", "m3", "r1"])
+        self.assertEqual(sub.stoichiometry["reactions"], ["r1"])
+        self.assertEqual(sub.stoichiometric_matrix().to_dense().tolist(), [[-1.0], [-1.0], [1.0]])
+        
+        
         #METABOLITOS
         test = MetabolicNetwork("metabolite-metabolite", True)
         test.load_from_file("temp.txt")
@@ -89,6 +270,29 @@ class TestMetabolic(unittest.TestCase):
         self.assertEqual(test.get_nodes_type(), ['r1', 'r2', 'r3', 'r3_b', 'r4', 'r4_b']) #Testagem com reações reversas em separado
         
         
+        #SNAPSHOTS
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, "temp.snap")
+            test.save(fname)
+            loaded = MetabolicNetwork.load(fname)
+            self.assertEqual((loaded.net_type, loaded.split_rev), ("reaction-reaction", True))
+            self.assertEqual(loaded.get_nodes_type(), test.get_nodes_type())
+            self.assertEqual(loaded.graph, test.graph)
+            self.assertEqual(loaded.prob_degree("inout"), {2: 0.3333, 3: 0.1667, 1: 0.5})
+            #Os metabolitos excluídos das projeções também são guardados
+            mm = MetabolicNetwork("metabolite-metabolite", currency = ["m1", "m6"])
+            mm.load_from_file("temp.txt")
+            mm.save(fname)
+            loaded = MetabolicNetwork.load(fname)
+            self.assertEqual(loaded.currency, {"m1", "m6"})
+            self.assertEqual(loaded.graph, mm.graph)
+            loaded.load_from_file("temp.txt") #Sem 'currency', os arcos de m1 e m6 seriam acrescentados
+            extra = MetabolicNetwork("metabolite-metabolite", currency = ["m1", "m6"])
+            extra.load_from_file("temp.txt")
+            extra.load_from_file("temp.txt")
+            self.assertEqual(loaded.graph, extra.graph)
+        
+        
         
     
 if __name__ == "__main__":
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 
+import os
+import tempfile
 import unittest
-from MyGraph import MyGraph
+from MyGraph import MyGraph, GraphPath
 
 class Test_Graph(unittest.TestCase):
     def setUp(self) -> None:
@@ -84,6 +86,237 @@ class Test_Graph(unittest.TestCase):
     def test_17(self):
         self.assertEqual(self.g3.shortest_path(1,6),"1 -> 2 -> 5 -> 6 (dist = 7)")
 
+    ######PREDECESSORS###############
+
+    def test_19(self):
+        self.gr.add_edge(5,2,4)
+        self.gr.change_weights(3,2,7)
+        self.assertEqual(self.gr.get_predecessors(2),[1, 3, 4, 5])
+        self.assertEqual(self.gr.rev_graph[2],{1:0, 3:7, 4:0, 5:4})
+        self.assertEqual(self.gr.in_degree(5),0)
+
+    def test_20(self):
+        self.gr.change_type(False)
+        self.assertEqual(self.gr.rev_graph[4],{3:None})
+        self.assertEqual(self.gr.degree(3),2)
+
+    ######DIJKSTRA###################
+
+    def test_21(self):
+        tree = self.g3.dijkstra_tree(1)
+        self.assertEqual(tree.distance(6),7)
+        self.assertEqual(tree.distance(4),3)
+        self.assertEqual(tree.path(6),GraphPath([1, 2, 5, 6], 7))
+        self.assertEqual(tree.path(1),GraphPath([1], 0))
+
+    def test_22(self):
+        self.assertEqual(self.gr.dijkstra_tree(2).path(1),None)
+        self.assertEqual(self.gr.dijkstra(2,1),False)
+        self.assertEqual(self.gr.dijkstra(1,9),None)
+
+    ######TRAVERSALS#################
+
+    def test_23(self):
+        self.assertEqual(list(self.g3.iter_bfs(1)),[2, 3, 4, 5, 6])
+        self.assertEqual(list(self.gr.iter_bfs(1, dist=True)),[(2, 0), (3, 3), (4, 5)])
+        self.assertEqual(next(self.gr2.iter_bfs(3)),2)
+        self.assertEqual(list(self.gr2.iter_bfs(9)),[])
+
+    def test_24(self):
+        self.assertEqual(self.g3.reachable_dfs(1),[2, 4, 6, 5, 3])
+        self.assertEqual(list(self.gr2.iter_dfs(1, depth=True)),[(2, 1), (3, 2), (4, 3)])
+        self.assertEqual(MyGraph({1:{2:None, 3:None}, 2:{3:None, 4:None}, 3:{}, 4:{}}).reachable_dfs(1),[2, 4, 3])
+        self.assertEqual(self.gr2.reachable_bfs(1),[2, 3, 4])
+
+    ######SCC########################
+
+    def test_25(self):
+        comps = self.gr2.strongly_connected_components()
+        self.assertEqual([sorted(c) for c in comps],[[2, 3, 4], [1]])
+        self.assertEqual(sorted(self.gr2.largest_scc()),[2, 3, 4])
+        dag, comps, membership = self.gr2.condensation()
+        self.assertEqual(dag.graph,{0:{}, 1:{0:None}})
+        self.assertEqual(membership[1],1)
+
+    def test_26(self):
+        dag = MyGraph({1:{2:None, 3:None}, 2:{3:None}, 3:{}})
+        self.assertEqual(dag.has_cycle(),False)
+        dag.add_edge(3,3)
+        self.assertEqual(dag.has_cycle(),True)
+        chain = MyGraph({i:{i+1:None} for i in range(5000)})
+        self.assertEqual(len(chain.strongly_connected_components()),5001)
+
+    ######BIDIRECTIONAL##############
+
+    def test_27(self):
+        g = MyGraph({1:{2:None, 3:None}, 2:{4:None}, 3:{4:None, 5:None}, 4:{6:None}, 5:{6:None}, 6:{}})
+        self.assertEqual(g.shortest_path(1,6),g.shortest_path(1,6,bidirectional=False))
+        self.assertEqual(g.distance(1,6),3)
+        self.assertEqual(g.distance(6,1),None)
+        self.assertEqual(g.shortest_path(3,6),[3, 4, 6])
+        self.assertEqual(MyGraph({1:{2:None}}).distance(1,2),1)
+
+    ######CACHE######################
+
+    def test_28(self):
+        self.gr2.enable_cache(maxsize=2)
+        self.assertEqual(self.gr2.shortest_path(1,4),[1, 2, 3, 4])
+        self.assertEqual(self.gr2.distance(1,3),2)
+        self.assertEqual(self.gr2.reachable_with_dist(1),[(2, 1), (3, 2), (4, 3)])
+        self.assertEqual(self.gr2.cache_info()["hits"],1)
+        self.assertEqual(self.gr2.cache_info()["misses"],2)
+        self.assertEqual(self.gr2.shortest_path(1,4),[1, 2, 3, 4])
+        self.assertEqual(self.gr2.cache_info()["hits"],2)
+        self.gr2.add_edge(1,4)
+        self.assertEqual(self.gr2.distance(1,4),1)
+        self.assertEqual(self.gr2.cache_info()["misses"],3)
+        self.gr2.reachable_dfs(2)
+        self.gr2.reachable_bfs(3)
+        self.assertEqual(self.gr2.cache_info()["size"],2)
+        tie = MyGraph({1:{2:None}, 2:{}, 3:{4:None, 1:None}, 4:{2:None}}) #2 caminhos mínimos de 3 para 2
+        path = tie.shortest_path(3,2)
+        tie.enable_cache()
+        self.assertEqual(tie.shortest_path(3,2),path)
+        self.assertEqual(tie.shortest_path(3,2),path)
+
+    def test_29(self):
+        self.g3.enable_cache()
+        self.assertEqual(self.g3.shortest_path(1,6),"1 -> 2 -> 5 -> 6 (dist = 7)")
+        self.assertEqual(self.g3.shortest_path(1,4),"1 -> 2 -> 4 (dist = 3)")
+        self.g3.change_weights(1,2,10)
+        self.assertEqual(self.g3.shortest_path(1,4),"1 -> 3 -> 4 (dist = 6)")
+        self.assertEqual(self.g3.cache_info()["hits"],1)
+        self.g3.disable_cache()
+        self.assertEqual(self.g3.cache_info(),None)
+
+    ######REACHABILITY###############
+
+    def test_30(self):
+        idx = self.gr2.reachability_index()
+        self.assertEqual(idx.reaches(1,4),True)
+        self.assertEqual(idx.reaches(4,1),False)
+        self.assertEqual(idx.reaches(2,2),True)
+        self.assertEqual(idx.reachable_set(1),{2, 3, 4})
+        self.gr2.add_edge(4,5)
+        self.assertEqual(idx.reachable_set(1),{2, 3, 4, 5})
+        self.gr2.add_edge(5,1)
+        self.assertEqual(idx.reachable_set(1),{1, 2, 3, 4, 5})
+        self.assertEqual(idx.reaches(6,1),False)
+
+    ######BULK LOADING###############
+
+    def test_31(self):
+        g = MyGraph.from_edges([(1,2,0), (2,3,3), (3,2,1), (3,4,2), (4,2,0)], weighted=True, batch_size=2)
+        self.assertEqual(g.graph,self.gr.graph)
+        self.assertEqual(g.get_predecessors(2),[1, 3, 4])
+        g2 = MyGraph.from_edges(((o,d) for o,d in self.gr2.get_edges()))
+        self.assertEqual(g2.graph,self.gr2.graph)
+        self.assertRaises(TypeError, MyGraph.from_edges, [(1,2,"a")], True)
+        self.assertRaises(ValueError, MyGraph.from_edges, [(1,)])
+
+    def test_32(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as tf:
+            tf.write("# origem destino peso\nm1 m2 2\nm2 m3 1.5\n\nm3 m1 3\n")
+        try:
+            g = MyGraph.from_edge_file(tf.name, weighted=True)
+        finally:
+            os.remove(tf.name)
+        self.assertEqual(g.get_edges(),[("m1","m2",2), ("m2","m3",1.5), ("m3","m1",3)])
+        self.assertEqual(g.shortest_path("m1","m3"),"m1 -> m2 -> m3 (dist = 3.5)")
+
+    ######VIEWS######################
+
+    def test_33(self):
+        sub = self.g3.subgraph_view([1, 2, 6, 5, 99])
+        self.assertEqual(sub.get_nodes(),[1, 2, 6, 5])
+        self.assertEqual(sub.get_edges(),[(1, 2, 2), (2, 1, 2), (2, 5, 2), (6, 5, 3), (5, 2, 2), (5, 6, 3)])
+        self.assertEqual(sub.shortest_path(1,6),"1 -> 2 -> 5 -> 6 (dist = 7)")
+        self.assertEqual(sub.in_degree(2),2)
+        self.assertRaises(TypeError, sub.add_edge, 1, 6)
+        self.g3.add_edge(1,6,1)
+        self.assertEqual(sub.shortest_path(1,6),"1 -> 6 (dist = 1)")
+
+    def test_34(self):
+        rev = self.gr2.reversed_view()
+        self.assertEqual(rev.get_successors(2),[1, 3, 4])
+        self.assertEqual(rev.reachable_bfs(4),[3, 2, 1])
+        self.assertEqual(rev.shortest_path(4,1),[4, 3, 2, 1])
+        self.assertEqual(rev.has_cycle(),True)
+        self.assertRaises(TypeError, rev.enable_cache)
+
+    ######INSTRUMENTATION############
+
+    def test_35(self):
+        with self.gr2.instrument() as report:
+            self.gr2.reachable_bfs(1)
+            self.gr2.reachable_bfs(3)
+            self.gr2.has_cycle()
+        self.assertEqual(report["reachable_bfs"]["calls"],2)
+        self.assertEqual(report["reachable_bfs"]["nodes"],7)
+        self.assertEqual(report["reachable_bfs"]["edges"],9)
+        self.assertEqual(report["strongly_connected_components"]["nodes"],4)
+        self.assertEqual(self.gr2._probe,None)
+        self.gr2.distance(1,4)
+        self.assertNotIn("distance", report)
+        #Valores inclusivos: has_cycle inclui o trabalho de strongly_connected_components
+        self.assertEqual(report["has_cycle"]["nodes"],4)
+        #Todos os pares: 6 origens x 6 nodos fixados, 20 arcos percorridos por origem (também em paralelo)
+        with self.g3.instrument() as report:
+            self.g3.all_pairs_stats(processes=1)
+            self.g3.all_pairs_stats(processes=2, chunksize=1)
+        self.assertEqual(report["all_pairs_stats"]["nodes"],72)
+        self.assertEqual(report["all_pairs_stats"]["edges"],240)
+
+    def test_36(self):
+        paths = self.g3.k_shortest_paths(1,6,4)
+        self.assertEqual([str(p) for p in paths[:3]],['1 -> 2 -> 5 -> 6 (dist = 7)', '1 -> 2 -> 4 -> 5 -> 6 (dist = 8)',
+                                                      '1 -> 2 -> 4 -> 3 -> 5 -> 6 (dist = 9)'])
+        self.assertEqual([p.dist for p in paths],[7, 8, 9, 10])
+        it = self.g3.iter_shortest_paths(1,6)
+        self.assertEqual(next(it),paths[0])
+        self.assertEqual(next(it),paths[1])
+        self.assertEqual(len(list(self.g3.iter_shortest_paths(1,6))),len(set(tuple(p.nodes) for p in self.g3.iter_shortest_paths(1,6))))
+        self.assertEqual(self.gr2.k_shortest_paths(1,4,5),[GraphPath([1, 2, 3, 4], 3)])
+        self.assertEqual(self.gr2.k_shortest_paths(4,1,3),[])
+        self.assertEqual(self.gr2.k_shortest_paths(9,1,3),None)
+
+    def test_37(self):
+        self.assertEqual(str(self.g3.astar(1,6)),self.g3.dijkstra(1,6))
+        exact = self.g3.reversed_view().dijkstra_tree(6).dist
+        self.assertEqual(self.g3.astar(1,6,lambda v, d: exact[v]),GraphPath([1, 2, 5, 6], 7))
+        self.assertEqual(self.gr2.astar(1,4),GraphPath([1, 2, 3, 4], 3))
+        self.assertEqual(self.gr2.astar(4,1),None)
+        self.assertEqual(self.gr2.astar(9,1),None)
+        line = MyGraph({i: {i + 1: 1, -i - 1: 1} for i in range(20)}, w=True)
+        line.add_vertex(20)
+        with line.instrument() as report:
+            line.astar(0,20)
+            dijkstra_nodes = report["astar"]["nodes"]
+            line.astar(0,20,lambda v, d: abs(d - v) if v >= 0 else 100)
+        self.assertEqual(report["astar"]["nodes"] - dijkstra_nodes,20)
+        self.assertTrue(dijkstra_nodes > 30)
+
+    def test_38(self):
+        #Grafos criados sem argumentos não partilham o dicionário nem o índice de antecessores
+        a = MyGraph()
+        b = MyGraph()
+        a.add_edge(1, 2)
+        self.assertEqual(a.get_predecessors(2),[1])
+        self.assertEqual(a.in_degree(2),1)
+        self.assertEqual(b.get_nodes(),[])
+        b.add_edge(3, 2)
+        self.assertEqual(b.get_predecessors(2),[3])
+        self.assertEqual(a.get_predecessors(2),[1])
+
+    def test_39(self):
+        #Com pesos, a distância é a do Dijkstra (10 pelo arco direto 1 -> 2, 2 por 1 -> 3 -> 2)
+        g = MyGraph({1:{2:10, 3:1}, 2:{}, 3:{2:1}}, w=True)
+        self.assertEqual(g.distance(1,2),2)
+        self.assertEqual(g.freeze().distance(1,2),2)
+        self.assertEqual(g.distance(2,1),None)
+        g.enable_cache()
+        self.assertEqual(g.distance(1,2),2)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+import pytest
+np = pytest.importorskip("numpy") #O NumPy é opcional: sem ele, estes testes são ignorados
+from MetabolicNetwork import MetabolicNetwork
+from StoichiometricMatrix import StoichiometricMatrix
+
+class Test_StoichiometricMatrix(unittest.TestCase):
+    def setUp(self) -> None:
+        self.net = MetabolicNetwork("metabolite-reaction")
+        self.net.load_from_lines(["R1: 2 M_h_c + A => 0.5 B + A", "R2: B <=> 3 C", "R3: C => D + D"])
+        self.S = self.net.stoichiometric_matrix()
+
+    def test_parse(self):
+        self.assertEqual(self.net.get_nodes_type(), [["M_h_c", "A", "B", "C", "D"], ["R1", "R2", "R3"]])
+        self.assertEqual(self.S.shape, (5, 3))
+        self.assertEqual(self.S.get_coefficient("M_h_c", "R1"), -2.0)
+        self.assertEqual(self.S.get_coefficient("B", "R1"), 0.5)
+        self.assertEqual(self.S.get_coefficient("A", "R1"), 0.0)
+        self.assertEqual(self.S.get_coefficient("D", "R3"), 2.0)
+        self.assertEqual(self.S.get_coefficient("D", "R1"), 0.0)
+        self.assertEqual(self.S.reversible.tolist(), [False, True, False])
+
+    def test_operations(self):
+        dense = self.S.to_dense()
+        self.assertEqual(dense.tolist(), [[-2, 0, 0], [0, 0, 0], [0.5, -1, 0], [0, 3, -1], [0, 0, 2]])
+        v = np.array([1.0, 2.0, 3.0])
+        self.assertTrue(np.allclose(self.S.dot(v), dense @ v))
+        self.assertTrue(np.allclose(self.S.rdot(np.arange(5)), dense.T @ np.arange(5)))
+        mets, reacs = self.S.connectivity()
+        self.assertEqual((mets.tolist(), reacs.tolist()), ([1, 1, 2, 2, 1], [3, 2, 2]))
+        for deg_type in ("in", "out", "inout"):
+            self.assertEqual(self.S.degrees(deg_type), self.net.all_degrees(deg_type))
+        #Na vista invertida, os substratos passam a produtos (e vice-versa)
+        rev = self.net.reversed_view()
+        R = StoichiometricMatrix.from_network(rev)
+        self.assertEqual(R.to_dense().tolist(), (-dense).tolist())
+        self.assertEqual(self.net.stoichiometry["values"][0], -2.0)
+        for deg_type in ("in", "out", "inout"):
+            self.assertEqual(R.degrees(deg_type), rev.all_degrees(deg_type))
+
+    def test_split_rev(self):
+        net = MetabolicNetwork("metabolite-reaction", True)
+        net.load_from_file("temp.txt")
+        S = net.stoichiometric_matrix()
+        self.assertEqual(S.reactions, ["r1", "r2", "r3", "r4"])
+        self.assertEqual(S.get_coefficient("m10", "r4"), 2.0)
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, "net.snap")
+            net.save(fname)
+            loaded = MetabolicNetwork.load(fname).stoichiometric_matrix()
+            self.assertEqual(loaded.to_dense().tolist(), S.to_dense().tolist())
+        self.assertRaises(ValueError, MetabolicNetwork().stoichiometric_matrix)
+
+if __name__ == '__main__':
+    unittest.main()